@@ -6,16 +6,19 @@ import os
 import zoneinfo
 
 import hikari
-import koe
 import lightbulb
 import lolpython
 import miru
 import pyfiglet
 
 from ..daemons import run_daemons
-from ..lib.hooks import require_not_denied
+from ..lib.daemon import Scheduler
+from ..lib.hooks import checkpoint_session, mark_active, mark_invoke, require_not_denied, start_timer, stop_timer
+from ..lib.nodes import NodePool
 from ..lib.permissions import AccessIsDenied, Node
+from ..lib.sessions import activity, preloader, session_manager, voice_index
 from ..lib.utils import utcnow
+from ..mvc.core import executor
 from ..mvc.discord.hooks import DiscordEventHandler
 from .conf import Config
 from .http import HTTPDaemon
@@ -36,20 +39,24 @@ class Bot(hikari.GatewayBot):
         self._permissions_root: Node | None = None
 
         # Handle Lavalink and Voice
-        self.koe = koe.Koe(
-            self,
-            host=self.conf.lavalink.host,
-            port=self.conf.lavalink.port,
-            password=self.conf.lavalink.password,
-        )
+        self.nodes: NodePool = NodePool(self, self.conf.lavalink.get_nodes())
 
         # Handle lightbulb
         from ..lib.injection.ctx import Context, get_context
+        from ..lib.injection.scope import release_scope
 
         self.lightbulb: lightbulb.Client = lightbulb.client_from_app(
             self,
             features=[lightbulb.features.COMMAND_INJECT_CONTEXT],
-            hooks=[require_not_denied],
+            hooks=[
+                start_timer,
+                require_not_denied,
+                mark_invoke,
+                stop_timer,
+                checkpoint_session,
+                mark_active,
+                release_scope,
+            ],
         )
         self.lightbulb.di.registry_for(lightbulb.di.Contexts.COMMAND).register_factory(
             Context, get_context
@@ -66,6 +73,9 @@ class Bot(hikari.GatewayBot):
         # Handle HTTP Daemon
         self._http_daemon: HTTPDaemon | None = None
 
+        # Internal daemons, started once the bot is ready.
+        self.scheduler: Scheduler | None = None
+
         # Define events
         self.subscribe(hikari.StartingEvent, self._load_command_handler)
         self.subscribe(hikari.ShardReadyEvent, self._on_ready)
@@ -76,6 +86,16 @@ class Bot(hikari.GatewayBot):
         self.subscribe(hikari.ChannelEvent, DiscordEventHandler.handle_channel_event)
         self.subscribe(hikari.RoleEvent, DiscordEventHandler.handle_role_event)
 
+        # Voice channel occupancy, for reaping sessions nobody is listening to.
+        self.subscribe(hikari.VoiceStateUpdateEvent, activity.on_voice_state_update)
+
+        # Where each user is in voice, for finding the web player's session.
+        self.subscribe(hikari.VoiceStateUpdateEvent, voice_index.on_voice_state_update)
+        self.subscribe(hikari.GuildAvailableEvent, voice_index.on_guild_available)
+        self.subscribe(hikari.GuildJoinEvent, voice_index.on_guild_available)
+        self.subscribe(hikari.GuildUnavailableEvent, voice_index.on_guild_unavailable)
+        self.subscribe(hikari.GuildLeaveEvent, voice_index.on_guild_unavailable)
+
     async def _load_command_handler(self, _) -> None:
         """Load Lightbulb."""
         await self.lightbulb.load_extensions("azura.ext")
@@ -114,8 +134,22 @@ class Bot(hikari.GatewayBot):
         allows her to know whether or not this is a *RE*initialization, and
         also what allows her to know how long it took, and what channel
         this information should be sent to.
+
+        Voice sessions checkpointed before the last shutdown are also
+        reconnected here, resuming where they left off, provided a node is
+        up to take them. If not, the session checkpoint daemon retries.
         """
-        pass
+        session_manager.attach_bot(self)
+        preloader.attach_bot(self)
+        session_manager.load()
+        await self.nodes.poll()
+        if not self.nodes.reachable:
+            if session_manager.unrestored:
+                self.logger.warning("No Lavalink node is reachable yet, deferring session restore.")
+            return
+        restored = await session_manager.restore()
+        if restored:
+            self.logger.info(f"Restored {len(restored)} voice session(s).")
 
     async def _on_ready(self, event: hikari.ShardReadyEvent) -> None:
         """
@@ -135,8 +169,10 @@ class Bot(hikari.GatewayBot):
 
         self.logger.info("Starting lavalink...")
 
-        self.logger.info("Starting internal daemons...")
-        run_daemons(self)
+        # Shards becoming ready again must not start a second set.
+        if self.scheduler is None:
+            self.logger.info("Starting internal daemons...")
+            self.scheduler = run_daemons(self)
         self.logger.info("Successfully completed boot.")
 
     def print_banner(self, *args, **kwargs):
@@ -187,6 +223,13 @@ class Bot(hikari.GatewayBot):
         else:
             self.logger.info("Call to reinitialize made, halting execution.")
 
+        # Sessions are still connected here, so this captures them as they are.
+        await session_manager.flush()
+        if self.scheduler is not None:
+            await self.scheduler.shutdown()
+        await self.nodes.close()
         await self.http_daemon.shutdown()
+        # Let queued writes land before the process goes away.
+        await asyncio.to_thread(executor.shutdown)
         self.logger.info(f"{self.conf.name} now shutting down.")
         await super().close()
@@ -46,7 +46,43 @@ DEFAULTS = {
         "database": {
             "backup_dir": "/path/to/azura/root/db_backups/",
             "path": "/path/to/db",
+            "backend": "sqlite",
+            "name": "azura",
+            "user": "azura",
+            "password": "some_pass",
+            "host": "localhost",
+            "port": 5432,
+            "pool_min_size": 2,
+            "pool_max_size": 16,
+            "pool_timeout": 10.0,
+            "read_workers": 4,
+            "write_workers": 4,
+            "conn_max_age": -1,
+            "sqlite": {
+                "journal_mode": "WAL",
+                "synchronous": "NORMAL",
+                "mmap_size": 268435456,
+                "cache_size": -65536,
+                "busy_timeout": 5000,
+            },
+            "backup": {
+                "enabled": True,
+                "interval_hours": 24.0,
+                "keep": 14,
+                "compression_level": 10,
+                "pages_per_step": 1024,
+            },
         },
+        "cache": {
+            "users": 4096,
+            "guilds": 256,
+            "channels": 2048,
+            "songs": 4096,
+            "artists": 2048,
+            "playlists": 256,
+        },
+        "tag_workers": 2,
+        "analysis_workers": 2,
     },
     "lavalink": {
         "enabled": False,
@@ -55,6 +91,18 @@ DEFAULTS = {
         "ssl": False,
         "password": "some_pass",
         "stream": "http://some_stream_url",
+        "normalize": True,
+        "target_loudness": -14.0,
+        "nodes": [],
+        "stats_interval": 10.0,
+        "watch_interval": 1.0,
+        "idle_timeout": 600.0,
+        "empty_timeout": 120.0,
+        "history_capacity": 200,
+        "history_log": False,
+        "preload_depth": 1,
+        "track_cache": 1024,
+        "action_window": 0.1,
     },
 }
 
@@ -85,9 +133,14 @@ class BaseConfig:
                     except TypeError:
                         args.append(value)
             except KeyError:
-                raise RuntimeError(
-                    f"Field '{name}' missing from config for {cls.__name__}."
-                )
+                if field.default is not dataclasses.MISSING:
+                    args.append(field.default)
+                elif field.default_factory is not dataclasses.MISSING:
+                    args.append(field.default_factory())
+                else:
+                    raise RuntimeError(
+                        f"Field '{name}' missing from config for {cls.__name__}."
+                    )
 
         if d:
             fields = ", ".join(d.keys())
@@ -105,10 +158,54 @@ class LogConfig(BaseConfig):
     levels: t.Dict[str, str]
 
 
+@dataclasses.dataclass
+class SQLiteConfig(BaseConfig):
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 268435456
+    cache_size: int = -65536
+    busy_timeout: int = 5000
+
+
+@dataclasses.dataclass
+class BackupConfig(BaseConfig):
+    enabled: bool = True
+    interval_hours: float = 24.0
+    keep: int = 14
+    compression_level: int = 10
+    pages_per_step: int = 1024
+
+
 @dataclasses.dataclass
 class DatabaseConfig(BaseConfig):
     backup_dir: pathlib.Path
     path: pathlib.Path
+    backend: str = "sqlite"
+    name: str = "azura"
+    user: str = "azura"
+    password: str = ""
+    host: str = "localhost"
+    port: int = 5432
+    pool_min_size: int = 2
+    pool_max_size: int = 16
+    pool_timeout: float = 10.0
+    read_workers: int = 4
+    write_workers: int = 4
+    conn_max_age: int = -1
+    sqlite: SQLiteConfig = dataclasses.field(default_factory=SQLiteConfig)
+    backup: BackupConfig = dataclasses.field(default_factory=BackupConfig)
+
+    _sub_fields: t.Tuple[str, ...] = ("sqlite", "backup")
+
+
+@dataclasses.dataclass
+class CacheConfig(BaseConfig):
+    users: int = 4096
+    guilds: int = 256
+    channels: int = 2048
+    songs: int = 4096
+    artists: int = 2048
+    playlists: int = 256
 
 
 @dataclasses.dataclass
@@ -124,8 +221,20 @@ class MVCConfig(BaseConfig):
     upload_root: pathlib.Path
     debug_mode: bool
     database: DatabaseConfig
+    cache: CacheConfig = dataclasses.field(default_factory=CacheConfig)
+    tag_workers: int = 2
+    analysis_workers: int = 2
+
+    _sub_fields: t.Tuple[str, ...] = ("database", "cache")
+
 
-    _sub_fields: t.Tuple[str] = ("database",)
+@dataclasses.dataclass
+class LavalinkNodeConfig(BaseConfig):
+    name: str
+    host: str
+    port: int
+    ssl: bool = False
+    password: str = ""
 
 
 @dataclasses.dataclass
@@ -135,6 +244,24 @@ class LavalinkConfig(BaseConfig):
     port: int
     ssl: bool
     password: str
+    normalize: bool = True
+    target_loudness: float = -14.0
+    nodes: t.List[t.Dict[str, t.Any]] = dataclasses.field(default_factory=list)
+    stats_interval: float = 10.0
+    watch_interval: float = 1.0
+    idle_timeout: float = 600.0
+    empty_timeout: float = 120.0
+    history_capacity: int = 200
+    history_log: bool = False
+    preload_depth: int = 1
+    track_cache: int = 1024
+    action_window: float = 0.1
+
+    def get_nodes(self) -> t.List[LavalinkNodeConfig]:
+        """The configured nodes, or the single node given by host and port if there are none."""
+        if not self.nodes:
+            return [LavalinkNodeConfig("main", self.host, self.port, self.ssl, self.password)]
+        return [LavalinkNodeConfig._dict_load(dict(node)) for node in self.nodes]
 
 
 @dataclasses.dataclass
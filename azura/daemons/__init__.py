@@ -2,6 +2,14 @@ import hikari
 
 from ..core.conf import Config
 from ..core.log import logging
+from ..lib.daemon import Scheduler
+from .analysis import analysis_daemon, waveform_daemon
+from .backup import backup_daemon
+from .nodes import node_stats_daemon
+from .reaper import reaper_daemon
+from .sessions import session_checkpoint_daemon
+from .tagging import tag_retry_daemon
+from .tracks import track_watch_daemon
 
 
 conf = Config.load()
@@ -9,17 +17,26 @@ logger = logging.getLogger(conf.name).getChild("daemons")
 
 
 __all__ = [
-
+    analysis_daemon,
+    backup_daemon,
+    node_stats_daemon,
+    reaper_daemon,
+    session_checkpoint_daemon,
+    tag_retry_daemon,
+    track_watch_daemon,
+    waveform_daemon,
 ]
 
 
-def run_daemons(bot: hikari.GatewayBot) -> None:
+def run_daemons(bot: hikari.GatewayBot) -> Scheduler:
     loop = hikari.internal.aio.get_or_make_loop()
+    scheduler = Scheduler()
 
     for daemon in __all__:
         daemon = daemon()
         logger.info(f"Starting {daemon.name} daemon")
         daemon.attach_bot(bot)
-        loop.create_task(daemon.service())
+        scheduler.add(daemon, loop)
 
-        
\ No newline at end of file
+    scheduler.start(loop)
+    return scheduler
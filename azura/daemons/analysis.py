@@ -0,0 +1,81 @@
+import asyncio
+import os
+import shutil
+
+from ..core.conf import Config
+from ..core.log import logging
+from ..lib.daemon import Mode, daemon
+from ..mvc.core import executor
+from ..mvc.music.analysis import analyze_song, get_pool, peaks_path, write_peaks
+from ..mvc.music.models import Song
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("daemons")
+
+BATCH_SIZE = 200
+
+# Songs which couldn't be measured are left alone until the next restart,
+# rather than being decoded again every run.
+_unmeasurable: set[int] = set()
+_unreadable: set[str] = set()
+
+
+# Batches can take a while, so the next waits for the last to finish.
+@daemon("loudness analysis", minutes=30, mode=Mode.FIXED_DELAY)
+async def analysis_daemon(bot):
+    if not conf.lavalink.normalize:
+        return
+    if shutil.which("ffmpeg") is None:
+        logger.warning("ffmpeg is not installed, so songs can't be measured for normalization.")
+        return
+
+    songs = await executor.read(lambda: list(
+        Song.objects.filter(loudness__isnull=True).exclude(pk__in=_unmeasurable).order_by("pk")[:BATCH_SIZE]
+    ))
+    if not songs:
+        return
+
+    # The pool bounds how many run at once.
+    results = await asyncio.gather(*[analyze_song(song) for song in songs], return_exceptions=True)
+    measured = 0
+    for song, result in zip(songs, results):
+        if isinstance(result, Exception) or result['loudness'] is None:
+            _unmeasurable.add(song.pk)
+        else:
+            measured += 1
+
+    logger.info(f"Measured loudness of {measured} songs, {len(songs) - measured} failed.")
+
+
+def find_missing_peaks() -> list[str]:
+    paths = Song.objects.exclude(file="").values_list("file", flat=True).distinct()
+    missing = []
+    for name in paths:
+        path = Song.file.field.storage.path(name)
+        if path not in _unreadable and os.path.isfile(path) and not os.path.exists(peaks_path(path)):
+            missing.append(path)
+    return missing
+
+
+@daemon("waveform peaks", minutes=30, mode=Mode.FIXED_DELAY)
+async def waveform_daemon(bot):
+    if shutil.which("ffmpeg") is None:
+        return
+
+    paths = (await executor.read(find_missing_peaks))[:BATCH_SIZE]
+    if not paths:
+        return
+
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *[loop.run_in_executor(get_pool(), write_peaks, path) for path in paths],
+        return_exceptions=True
+    )
+    written = 0
+    for path, result in zip(paths, results):
+        if result is True:
+            written += 1
+        else:
+            _unreadable.add(path)
+    logger.info(f"Wrote waveform peaks for {written} songs, {len(paths) - written} failed.")
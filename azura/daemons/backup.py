@@ -0,0 +1,30 @@
+import time
+
+from ..core.conf import Config
+from ..core.log import logging
+from ..lib.daemon import daemon
+from ..lib.utils import get_byte_unit
+from ..mvc.core.db import backup_database, get_backups, prune_backups
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("daemons")
+
+
+# Checking more often than backups are due keeps restarts from pushing the
+# next backup back by a whole interval.
+@daemon("database backup", minutes=min(60.0, conf.mvc.database.backup.interval_hours * 60))
+async def backup_daemon(bot):
+    if not conf.mvc.database.backup.enabled:
+        return
+
+    backups = get_backups("auto")
+    interval = conf.mvc.database.backup.interval_hours * 3600
+    if backups and time.time() - backups[0].stat().st_mtime < interval:
+        return
+
+    path = await backup_database("auto")
+    logger.info(f"Backed up database to {path.name} ({get_byte_unit(path.stat().st_size)}).")
+
+    for removed in prune_backups("auto", conf.mvc.database.backup.keep):
+        logger.info(f"Removed expired backup {removed.name}.")
@@ -0,0 +1,10 @@
+from ..core.conf import Config
+from ..lib.daemon import daemon
+
+
+conf = Config.load()
+
+
+@daemon("lavalink node stats", seconds=conf.lavalink.stats_interval)
+async def node_stats_daemon(bot):
+    await bot.nodes.poll()
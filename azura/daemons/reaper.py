@@ -0,0 +1,60 @@
+import koe
+
+from ..core.conf import Config
+from ..core.log import logging
+from ..lib.daemon import daemon
+from ..lib.sessions import Action, activity, histories, player_states, session_actions, session_manager
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("daemons")
+
+
+@daemon("session reaper", minutes=1)
+async def reaper_daemon(bot):
+    me = bot.get_me()
+    if me is None:
+        return
+
+    reclaimed = 0
+    async for session in bot.nodes.sessions():
+        guild_id = session.guild_id
+
+        # Kicked, or disconnected from Discord's side, without the session
+        # hearing about it. Nothing will ever touch it again.
+        orphaned = bot.cache.get_voice_state(guild_id, me.id) is None
+        if orphaned:
+            empty = idle = False
+        else:
+            # Playing counts as activity, even if nobody has touched the session.
+            if session._current_track is not None and not session._paused:
+                activity.touch(guild_id)
+
+            empty = activity.empty_for(guild_id) >= conf.lavalink.empty_timeout
+            idle = activity.idle_for(guild_id) >= conf.lavalink.idle_timeout
+            if not empty and not idle:
+                continue
+
+        try:
+            await session.disconnect(user_id=me.id)
+        except koe.errors.KoeError as e:
+            logger.warning(f"Failed to reap session in {guild_id}: {e}")
+            # An orphaned session has no voice connection left to close,
+            # so it's cleaned up regardless.
+            if not orphaned:
+                continue
+
+        histories.record(guild_id, me.id, Action.DISCONNECT)
+        histories.discard(guild_id)
+        player_states.discard(guild_id)
+        activity.forget(guild_id)
+        session_actions.discard(guild_id)
+        # Dropping the checkpoint keeps the session from coming back on restart.
+        session_manager.mark_dirty(guild_id)
+        reclaimed += 1
+        reason = "orphaned" if orphaned else "empty" if empty else "idle"
+        logger.info(f"Reaped {reason} session in {guild_id}.")
+
+    if reclaimed:
+        activity.reclaimed += reclaimed
+        logger.info(f"Reclaimed {reclaimed} session(s), {activity.reclaimed} since boot.")
@@ -0,0 +1,20 @@
+from ..core.conf import Config
+from ..core.log import logging
+from ..lib.daemon import daemon
+from ..lib.sessions import session_manager
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("daemons")
+
+
+# Commands checkpoint sessions as they change them, but tracks advancing
+# on their own don't, so this keeps saved positions from drifting far.
+# Sessions which couldn't be restored at startup are retried here too.
+@daemon("session checkpoint", minutes=1)
+async def session_checkpoint_daemon(bot):
+    if session_manager.unrestored and bot.nodes.reachable:
+        restored = await session_manager.restore()
+        if restored:
+            logger.info(f"Restored {len(restored)} voice session(s).")
+    await session_manager.checkpoint_all()
@@ -0,0 +1,9 @@
+from ..lib.daemon import daemon
+from ..mvc.music.tagging import tag_writer
+
+
+# The first run happens at boot, which is also when anything left over from
+# the last run is picked back up.
+@daemon("tag retry", minutes=10)
+async def tag_retry_daemon(bot):
+    tag_writer.retry()
@@ -0,0 +1,32 @@
+from ..core.conf import Config
+from ..lib.daemon import daemon
+from ..lib.sessions import player_states, preloader
+from ..mvc.music.playback import apply_gain
+
+
+conf = Config.load()
+
+
+# No Lavalink events reach azura, so this is how tracks which start on
+# their own, rather than because of a command, are noticed at all.
+@daemon("track watcher", seconds=conf.lavalink.watch_interval)
+async def track_watch_daemon(bot):
+    me = bot.get_me()
+    if me is None:
+        return
+
+    for guild_id, states in bot.cache.get_voice_states_view().items():
+        if me.id not in states:
+            continue
+
+        session = await bot.nodes.get_session_or_none_by(guild_id)
+        if session is None:
+            continue
+
+        if not player_states.observe(session):
+            continue
+
+        # Warm whatever follows while this track plays, and since filters
+        # belong to the player, give the new track its own gain.
+        preloader.schedule(guild_id)
+        await apply_gain(session)
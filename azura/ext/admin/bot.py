@@ -8,7 +8,10 @@ import sys
 from ...core.conf import Config
 from ...lib.utils import strfdelta, get_byte_unit, get_dir_size, aio_get
 from ...lib.components import validate, pagify
-from ...lib.ctx import DelayedResponse
+from ...lib.ctx import DelayedResponse, TextTable
+from ...lib.metrics import latency
+from ...mvc.core.cache import get_cache_stats
+from ...mvc.core.executor import get_executor_stats
 
 
 conf = Config.load()
@@ -133,4 +136,40 @@ class IP(
             ip = await aio_get("https://api.ipify.org")
             embed = hikari.Embed(title="TCP/IP Information")
             embed.add_field("IP Address", ip)
-            return await response.complete("", embed=embed)
\ No newline at end of file
+            return await response.complete("", embed=embed)
+
+
+@bot.register
+class Stats(
+    lightbulb.SlashCommand,
+    name="stats",
+    description="View command latency, database and cache statistics."
+):
+    @lightbulb.invoke
+    async def invoke(self, ctx: lightbulb.Context) -> None:
+        summary = latency.summary()
+        sections = []
+
+        rows = [("Pool", "Workers", "Depth", "Peak", "Wait p50", "Wait p95", "Run p50", "Run p95")]
+        for name, (workers, depth, peak, wait50, wait95, run50, run95) in get_executor_stats().items():
+            rows.append((name, workers, depth, peak, f"{wait50:.1f}", f"{wait95:.1f}", f"{run50:.1f}", f"{run95:.1f}"))
+        sections.append(f"Database (ms)\n{TextTable(rows).rendered}")
+
+        caches = get_cache_stats()
+        if caches:
+            rows = [("Cache", "Size", "Hits", "Misses", "Hit %")]
+            for name, (size, capacity, hits, misses, ratio) in caches.items():
+                rows.append((name, f"{size}/{capacity}", hits, misses, f"{ratio * 100:.1f}"))
+            sections.append(f"Caches\n{TextTable(rows).rendered}")
+
+        for command, stages in summary.items():
+            rows = [("Stage", "N", "p50 ms", "p95 ms", "p99 ms")]
+            for stage, (count, p50, p95, p99) in stages.items():
+                rows.append((stage, count, f"{p50:.1f}", f"{p95:.1f}", f"{p99:.1f}"))
+            sections.append(f"/{command}\n{TextTable(rows).rendered}")
+
+        pages = pagify("\n".join(sections), header='```', footer='```', delimiter='\n', limit_to=1900)
+        navigator = nav.NavigatorView(pages=pages)
+        builder = await navigator.build_response_async(ctx.client.app.miru)
+        await builder.create_initial_response(ctx.interaction)
+        ctx.client.app.miru.start_view(navigator)
@@ -1,8 +1,10 @@
 import lightbulb
 
 from ...core.conf import Config
+from ...lib.ctx import DelayedResponse
 from ...lib.hooks import require_granted
-from ...mvc.core.db import dump_database
+from ...lib.utils import get_byte_unit
+from ...mvc.core.db import backup_database
 
 
 conf = Config.load()
@@ -13,15 +15,15 @@ database = lightbulb.Group("database", f"Commands related to {conf.name}'s datab
 class Dump(
     lightbulb.SlashCommand,
     name="dump",
-    description=f"Dumps {conf.name}'s entire database to a SQL file.",
+    description=f"Takes a compressed backup of {conf.name}'s entire database.",
     hooks=[require_granted]
 ):
     
     @lightbulb.invoke
     async def invoke(self, ctx: lightbulb.Context) -> None:
-        fname = ctx.client.app.localnow().strftime('manual_backup_%Y_%m_%d_%H_%M_%S.sql')
-        dump_database(fname)
-        return await ctx.respond("Database backup was successful.")
+        async with DelayedResponse(ctx, "Backing up database...", timeout=600) as response:
+            path = await backup_database("manual")
+            return await response.complete(f"Database backed up to `{path.name}` ({get_byte_unit(path.stat().st_size)}).")
 
 
 @database.register
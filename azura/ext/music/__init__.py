@@ -12,8 +12,11 @@ from ...lib.hooks import (
     require_user_in_voice,
 )
 from ...lib.injection.ctx import Context
+from ...lib.components import LazyNavigatorView
+from ...lib.sessions import Action, HistoryPages, histories, player_states, session_actions
 from ...mvc.discord.models import User
 from ...mvc.music.models import Playlist, Song, Stream
+from ...mvc.music.playback import apply_gain, enqueue_song, incr_volume, set_volume
 
 conf = Config.load()
 music = lightbulb.Loader()
@@ -32,6 +35,7 @@ class Connect(
         await session.connect(
             ctx.guild_id, ctx.voice_id, channel_id=ctx.channel_id, user_id=ctx.user.id
         )
+        histories.record(ctx.guild_id, ctx.user.id, Action.CONNECT)
         await ctx.respond("Connected.")
 
 
@@ -45,6 +49,10 @@ class Disconnect(
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session):
         await session.disconnect(user_id=ctx.user.id)
+        histories.record(ctx.guild_id, ctx.user.id, Action.DISCONNECT)
+        # The log has the record, and the next session starts afresh.
+        histories.discard(ctx.guild_id)
+        player_states.discard(ctx.guild_id)
         await ctx.respond("Disconnected.")
 
 
@@ -68,13 +76,10 @@ class Play(
                     channel_id=ctx.channel_id,
                     user_id=ctx.user.id,
                 )
+                histories.record(ctx.guild_id, ctx.user.id, Action.CONNECT)
 
-            track = await ctx.bot.koe.load_tracks(songs[0][1].file.path)
-            assert isinstance(track, koe.Track)
-            s = await Song.objects.aget(
-                file__contains=track.info.identifier.split("/")[-1]
-            )
-            await session.enqueue(track, user_id=ctx.user.id)
+            await enqueue_song(session, songs[0][1], ctx.user.id)
+            histories.record(ctx.guild_id, ctx.user.id, Action.ENQUEUE)
             await ctx.respond(f"Playing `{songs[0][1].name}`")
         else:
             await ctx.respond(f"No songs found by the search term `{self.name}`.")
@@ -94,8 +99,12 @@ class StreamCmd(
         except Stream.DoesNotExist:
             return await ctx.respond("No stream found for this user.")
 
-        track = await ctx.bot.koe.load_tracks(stream.uri)
+        # Loaded on the session's own node, which is the best one available
+        # for a new session, so no single node is relied on.
+        track = await session.koe.load_tracks(stream.uri)
         await session.play(track)
+        await apply_gain(session)
+        histories.record(ctx.guild_id, ctx.user.id, Action.PLAY)
         await ctx.respond(f"Connected to `{stream.name}`")
 
 
@@ -108,7 +117,10 @@ class Stop(
 ):
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session):
-        await session.stop(user_id=ctx.user.id)
+        await session_actions.get(ctx.guild_id).submit(
+            "stop", lambda: session.stop(user_id=ctx.user.id)
+        )
+        histories.record(ctx.guild_id, ctx.user.id, Action.STOP)
         await ctx.respond("Playback halted.")
 
 
@@ -119,11 +131,15 @@ class Volume(lightbulb.SlashCommand, name="volume", description="Set volume."):
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session):
         if self.level.startswith("+") or self.level.startswith("-"):
-            await session.incr_volume(int(self.level), user_id=ctx.user.id)
+            change = lambda: incr_volume(session, int(self.level), ctx.user.id)
         else:
-            await session.set_volume(int(self.level), user_id=ctx.user.id)
+            change = lambda: set_volume(session, int(self.level), ctx.user.id)
 
-        await ctx.respond(f"Set volume to {session._volume}%.")
+        # Serialized with the web player's changes, so neither is lost.
+        await session_actions.get(ctx.guild_id).submit("volume", change)
+        histories.record(ctx.guild_id, ctx.user.id, Action.VOLUME)
+        player_states.sync(session)
+        await ctx.respond(f"Set volume to {player_states.get_for(session).volume}%.")
 
 
 @music.command
@@ -139,13 +155,19 @@ class Skip(
 
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session):
-        try:
+        async def skip():
             if self.skip.startswith("+") or self.skip.startswith("-"):
                 num = int(self.skip)
                 await session.skip(by=num, user_id=ctx.user.id)
             else:
                 num = int(self.skip)
                 await session.skip(to=num, user_id=ctx.user.id)
+            await apply_gain(session)
+
+        try:
+            await session_actions.get(ctx.guild_id).submit("skip", skip)
+            player_states.sync(session)
+            histories.record(ctx.guild_id, ctx.user.id, Action.SKIP)
             await ctx.respond(f"Skipped `{self.skip}`")
         except koe.errors.InvalidPosition as e:
             await ctx.respond(str(e))
@@ -155,11 +177,15 @@ class Skip(
 class Pause(lightbulb.SlashCommand, name="pause", description="Pause playback."):
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session):
-        success = await session.set_pause(True, user_id=ctx.user.id)
+        success = await session_actions.get(ctx.guild_id).submit(
+            "pause", lambda: session.set_pause(True, user_id=ctx.user.id)
+        )
+        player_states.sync(session)
         if not success:
             await ctx.respond("I'm already paused.")
             return
 
+        histories.record(ctx.guild_id, ctx.user.id, Action.PAUSE)
         await ctx.respond("Playback paused.")
 
 
@@ -167,11 +193,15 @@ class Pause(lightbulb.SlashCommand, name="pause", description="Pause playback.")
 class Resume(lightbulb.SlashCommand, name="resume", description="Resume playback."):
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session):
-        success = await session.set_pause(False, user_id=ctx.user.id)
+        success = await session_actions.get(ctx.guild_id).submit(
+            "resume", lambda: session.set_pause(False, user_id=ctx.user.id)
+        )
+        player_states.sync(session)
         if not success:
             await ctx.respond("Playback is not paused.")
             return
 
+        histories.record(ctx.guild_id, ctx.user.id, Action.RESUME)
         await ctx.respond("Playback resumed.")
 
 
@@ -208,15 +238,14 @@ class Christmas(
             await ctx.respond("Oh, come on. It's not even after thanksgiving yet.")
             return
 
-        playlist = await Playlist.objects.aget(id=1)
-        songs = []
-        async for song in playlist.songs.all():
-            songs.append(song)
+        playlist = await Playlist.objects.aget_cached(1)
+        songs = await Playlist.objects.aget_songs_cached(playlist)
 
         random.shuffle(songs)
         for song in songs:
-            track = await ctx.bot.koe.load_tracks(song.file.path)
-            await session.enqueue(track, user_id=ctx.user.id)
+            await enqueue_song(session, song, ctx.user.id)
+        if songs:
+            histories.record(ctx.guild_id, ctx.user.id, Action.ENQUEUE)
 
         await ctx.respond("Enqueued Christmas playlist.")
 
@@ -230,16 +259,15 @@ class History(
 ):
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session):
-        history = await session.get_history()
-        msg = "**These are the last 20 actions performed in this session:**\n```"
-
-        for record in history[-20:]:
-            actor = record.get_actor(ctx.bot)
-            assert actor is not None
+        history = histories.peek(ctx.guild_id)
+        if history is None or not len(history):
+            await ctx.respond("Nothing has happened in this session yet.")
+            return
 
-            msg += f"[{record.time}] {record.action} by {actor.display_name}\n"
-        msg += "```"
-        await ctx.respond(msg)
+        navigator = LazyNavigatorView(HistoryPages(ctx.bot, history))
+        builder = await navigator.build_response_async(ctx.bot.miru)
+        await builder.create_initial_response(ctx.interaction)
+        ctx.bot.miru.start_view(navigator)
 
 
 @music.command
@@ -254,13 +282,15 @@ class Enqueue(
     @lightbulb.invoke
     async def invoke(self, ctx: Context, session: koe.Session, user: User):
         try:
-            playlist = await Playlist.objects.aget(owner=user, name=self.name)
+            playlist = await Playlist.objects.aget_cached_by(owner_id=user.id, name=self.name)
         except Playlist.DoesNotExist:
             await ctx.respond(f"You don't have a playlist named `{self.name}`.")
             return
 
-        async for song in playlist.songs.all():
-            track = await session.koe.load_tracks(song.file.path)
-            await session.enqueue(track, user_id=ctx.user.id)
+        songs = await Playlist.objects.aget_songs_cached(playlist)
+        for song in songs:
+            await enqueue_song(session, song, ctx.user.id)
+        if songs:
+            histories.record(ctx.guild_id, ctx.user.id, Action.ENQUEUE)
 
         await ctx.respond(f"Enqueued your playlist, `{playlist.name}`.")
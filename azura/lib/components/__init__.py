@@ -5,7 +5,7 @@ Components are what Discord calls the menus, select boxes, buttons,
 and other things associated with an application command. All of the
 things defined here serve that purpose in some way or another.
 """
-from .pagination import pagify
+from .pagination import LazyNavigatorView, pagify
 from .validation import Validation, validate
 
 
@@ -13,4 +13,5 @@ __all__ = [
     "Validation",
     "validate",
     "pagify",
+    "LazyNavigatorView",
 ]
@@ -5,44 +5,98 @@ that follows defines the behavior of them, as well as interfaces
 for Elysia to interact with them, and shut them down when need be.
 Most daemons are defined within core.bot.
 
+Every daemon is run by a single scheduler, which keeps a heap of when
+each is next due and sleeps until the earliest. A fixed-rate daemon is
+due every period from when it was first due, however long it takes to
+run, and runs it missed while busy are skipped rather than run back to
+back. A fixed-delay daemon is due a period after its last run finished.
+
+    * Mode - Enum of the ways a daemon's next run can be scheduled
+    * DaemonStats - Dataclass of a daemon's run durations and failures
     * Daemon - Class abstracting a daemon
+    * Scheduler - Class running every daemon from a heap of their next run times
     * daemon - Decorator which turns a function into a daemon with the specific execution period
 """
+from __future__ import annotations
 
 import asyncio
-import hikari
-import traceback
+import dataclasses
+import enum
+import heapq
+import math
+import random
+import time
 import typing as t
 
+import hikari
+
+from ..core.conf import Config
+from ..core.log import logging
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("daemons")
+
+
+class Mode(enum.Enum):
+    FIXED_RATE = "rate"
+    FIXED_DELAY = "delay"
+
+
+@dataclasses.dataclass
+class DaemonStats:
+    runs: int = 0
+    failures: int = 0
+    # Runs which came due while the daemon was already at its concurrency limit.
+    overlaps: int = 0
+    # Fixed-rate runs which were skipped because the scheduler fell behind.
+    missed: int = 0
+    last_duration: float | None = None
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    last_error: str | None = None
+
+    @property
+    def mean_duration(self) -> float:
+        return self.total_duration / self.runs if self.runs else 0.0
+
+    def record(self, duration: float, error: BaseException | None = None) -> None:
+        self.runs += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        if error is not None:
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
 
 class Daemon:
     ALL = []
 
     def __init__(self,
         name: str,
-        callback: t.Coroutine,
+        callback: t.Callable[..., t.Coroutine],
         seconds: float,
         *args: t.Any,
+        mode: Mode = Mode.FIXED_RATE,
+        jitter: float = 0,
+        max_concurrency: int = 1,
         **kwargs: t.Any
     ):
         self.name = name
-        self._callback: t.Coroutine = callback
+        self._callback = callback
         self.args = args
         self.kwargs = kwargs
         self.seconds: float = seconds
+        self.mode: Mode = mode
+        self.jitter: float = jitter
+        self.max_concurrency: int = max_concurrency
+        self.stats: DaemonStats = DaemonStats()
+        self.running: int = 0
         self._bot: t.Optional[hikari.GatewayBot] = None
     
     def attach_bot(self, bot: hikari.GatewayBot) -> None:
         self._bot = bot
-
-    @property
-    def callback(self) -> t.Coroutine:
-        async def inner(*args, **kwargs):
-            try:
-                return await self._callback(*args, **kwargs)
-            except Exception as e:
-                traceback.print_exc()
-        return inner
         
     @property
     def bot(self) -> hikari.GatewayBot:
@@ -50,20 +104,130 @@ class Daemon:
             raise ValueError("Bot not attached.")
         return self._bot
     
-    async def service(self) -> None:
+    def delay(self) -> float:
+        """Random delay added to each run, so daemons sharing a period don't all run at once."""
+        return random.uniform(0, self.jitter) if self.jitter > 0 else 0.0
+    
+    async def run(self) -> None:
+        self.running += 1
+        start = time.monotonic()
+        error = None
+        try:
+            await self._callback(self.bot, *self.args, **self.kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+            logger.exception(f"The {self.name} daemon failed.")
+        finally:
+            self.running -= 1
+        self.stats.record(time.monotonic() - start, error)
+
+
+class Scheduler:
+    def __init__(self):
+        self._heap: list[tuple[float, int, Daemon, float]] = []
+        self._counter: int = 0
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+        self.daemons: list[Daemon] = []
+    
+    def _push(self, daemon: Daemon, due: float) -> None:
+        # Jitter only shifts when a run fires, never when the next is due.
+        self._counter += 1
+        heapq.heappush(self._heap, (due + daemon.delay(), self._counter, daemon, due))
+        self._wakeup.set()
+    
+    def add(self, daemon: Daemon, loop: asyncio.AbstractEventLoop) -> None:
+        self.daemons.append(daemon)
+        # Daemons run once as soon as they're started.
+        self._push(daemon, loop.time())
+    
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
         while True:
-            await self.callback(self.bot, *self.args, **self.kwargs)
-            await asyncio.sleep(self.seconds)
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            fire_at = self._heap[0][0]
+            if fire_at > loop.time():
+                # Woken early if a daemon is scheduled ahead of this one.
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), fire_at - loop.time())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            _, _, daemon, due = heapq.heappop(self._heap)
+            if daemon.running >= daemon.max_concurrency:
+                daemon.stats.overlaps += 1
+                logger.warning(f"The {daemon.name} daemon is still running, skipping this run.")
+                if daemon.mode is Mode.FIXED_DELAY:
+                    # Rescheduled once the run still going finishes.
+                    continue
+            else:
+                task = loop.create_task(daemon.run())
+                self._tasks.add(task)
+                task.add_done_callback(lambda task, daemon=daemon: self._done(task, daemon))
+            
+            if daemon.mode is Mode.FIXED_RATE:
+                now = loop.time()
+                due += daemon.seconds
+                if due <= now:
+                    missed = math.floor((now - due) / daemon.seconds) + 1
+                    daemon.stats.missed += missed
+                    due += missed * daemon.seconds
+                self._push(daemon, due)
+    
+    def _done(self, task: asyncio.Task, daemon: Daemon) -> None:
+        self._tasks.discard(task)
+        if task.cancelled() or self._task is None:
+            return
+        # Don't stack runs of a fixed-delay daemon which ran with others.
+        if daemon.mode is Mode.FIXED_DELAY and daemon.running == 0:
+            self._push(daemon, asyncio.get_running_loop().time() + daemon.seconds)
+    
+    async def shutdown(self) -> None:
+        task, self._task = self._task, None
+        tasks = [task, *self._tasks] if task is not None else list(self._tasks)
+        for pending in tasks:
+            pending.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._heap.clear()
 
 
-def daemon(name, seconds: float=0, minutes: float=0, hours: float=0, days: float=0) -> t.Callable:
+def daemon(
+    name,
+    seconds: float=0,
+    minutes: float=0,
+    hours: float=0,
+    days: float=0,
+    mode: Mode=Mode.FIXED_RATE,
+    jitter: float=0,
+    max_concurrency: int=1
+) -> t.Callable:
     seconds = seconds + (minutes * 60) + (hours * 3600) + (days * 86400)
     if seconds <= 0:
         raise ValueError("The total time for a daemon's execution cannot be 0.")
+    if max_concurrency < 1:
+        raise ValueError("A daemon must be allowed to run at least once at a time.")
     
     def inner(func) -> t.Callable:
         def inner_inner(*args, **kwargs) -> Daemon:
-            return Daemon(name, func, seconds, *args, **kwargs)
+            return Daemon(
+                name, func, seconds, *args,
+                mode=mode, jitter=jitter, max_concurrency=max_concurrency,
+                **kwargs
+            )
         Daemon.ALL.append(inner_inner)
         return inner_inner
-    return inner
\ No newline at end of file
+    return inner
@@ -8,7 +8,8 @@ as the hooks here are designed to halt execution of a command if the permissions
 state is incorrect.
 """
 from .permissions import require_granted, require_not_denied, require_owner
-from .voice import require_user_in_voice, require_existing_session, require_no_session, SessionError
+from .voice import require_user_in_voice, require_existing_session, require_no_session, checkpoint_session, mark_active, SessionError
+from .timing import timed, start_timer, mark_invoke, stop_timer
 
 
 __all__ = [
@@ -18,5 +19,11 @@ __all__ = [
     'require_user_in_voice',
     'require_existing_session',
     'require_no_session',
-    'SessionError'
+    'checkpoint_session',
+    'mark_active',
+    'SessionError',
+    'timed',
+    'start_timer',
+    'mark_invoke',
+    'stop_timer'
 ]
\ No newline at end of file
@@ -0,0 +1,45 @@
+import dataclasses
+import time
+import typing as t
+
+import hikari
+import lightbulb
+
+from ..metrics import latency
+
+
+_marks: t.Dict[hikari.Snowflake, t.Dict[str, float]] = {}
+
+
+def command_key(ctx: lightbulb.Context) -> str:
+    return ctx.command_data.qualified_name
+
+
+def timed(hook: lightbulb.ExecutionHook) -> lightbulb.ExecutionHook:
+    """Record the runtime of a hook under the `hook:<name>` stage."""
+    async def func(pipeline: lightbulb.ExecutionPipeline, ctx: lightbulb.Context) -> None:
+        with latency.time(command_key(ctx), f"hook:{hook.name}"):
+            await hook(pipeline, ctx)
+    return dataclasses.replace(hook, func=func)
+
+
+@lightbulb.hook(lightbulb.ExecutionSteps.MAX_CONCURRENCY)
+def start_timer(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context) -> None:
+    _marks[ctx.interaction.id] = {"start": time.perf_counter()}
+
+
+@lightbulb.hook(lightbulb.ExecutionSteps.PRE_INVOKE, skip_when_failed=True)
+def mark_invoke(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context) -> None:
+    _marks.setdefault(ctx.interaction.id, {})["invoke"] = time.perf_counter()
+
+
+@lightbulb.hook(lightbulb.ExecutionSteps.POST_INVOKE)
+def stop_timer(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context) -> None:
+    now = time.perf_counter()
+    marks = _marks.pop(ctx.interaction.id, {})
+    key = command_key(ctx)
+
+    if "invoke" in marks:
+        latency.observe(key, "invoke", now - marks["invoke"])
+    if "start" in marks:
+        latency.observe(key, "total", now - marks["start"])
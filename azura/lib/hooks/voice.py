@@ -2,6 +2,9 @@ import hikari
 import koe
 import lightbulb
 
+from .timing import timed
+from ..sessions import activity, session_manager
+
 
 class SessionError(koe.errors.KoeError):
     def __init__(self, message: str, internal: bool=False):
@@ -9,6 +12,7 @@ class SessionError(koe.errors.KoeError):
         self.internal = internal
 
 
+@timed
 @lightbulb.hook(lightbulb.ExecutionSteps.CHECKS)
 def require_user_in_voice(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context, cache: hikari.api.Cache) -> None:
     if ctx.user is None or ctx.guild_id is None:
@@ -21,13 +25,25 @@ def require_user_in_voice(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context
 
 
 
+@timed
 @lightbulb.hook(lightbulb.ExecutionSteps.CHECKS)
 def require_existing_session(_: lightbulb.ExecutionPipeline, __: lightbulb.Context, session: koe.Session) -> None:
     if not session.exists:
         raise SessionError("I have to be connected to a voice channel to use this command.")
 
 
+@timed
 @lightbulb.hook(lightbulb.ExecutionSteps.CHECKS)
 def require_no_session(_: lightbulb.ExecutionPipeline, __: lightbulb.Context, session: koe.Session) -> None:
     if session.exists:
-        raise SessionError("I'm already connected to a voice channel.")
\ No newline at end of file
+        raise SessionError("I'm already connected to a voice channel.")
+
+@lightbulb.hook(lightbulb.ExecutionSteps.POST_INVOKE)
+def checkpoint_session(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context) -> None:
+    session_manager.mark_dirty(ctx.guild_id)
+
+
+# Denied and failed commands don't count as anyone using the session.
+@lightbulb.hook(lightbulb.ExecutionSteps.POST_INVOKE, skip_when_failed=True)
+def mark_active(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context) -> None:
+    activity.touch(ctx.guild_id)
@@ -3,6 +3,7 @@ import lightbulb
 import typing as t
 
 from ...core.bot import Bot
+from ..metrics import latency
 
 
 class Context(lightbulb.Context):    
@@ -25,6 +26,10 @@ class Context(lightbulb.Context):
         
         return state.channel_id
 
+    async def respond(self, *args, **kwargs) -> hikari.Snowflakeish:
+        with latency.time(self.command_data.qualified_name, "respond"):
+            return await super().respond(*args, **kwargs)
+
 
 async def get_context(ctx: lightbulb.Context) -> Context:
     ctx = Context(
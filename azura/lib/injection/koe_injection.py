@@ -7,12 +7,15 @@ from the database associated with that object.
 """
 import koe
 from .ctx import Context
+from .scope import scoped
 
 
+@scoped
 async def get_session(ctx: Context) -> koe.Session:
-    session = await ctx.bot.koe.get_session_or_none_by(guild_id=ctx.guild_id)
+    session = await ctx.bot.nodes.get_session_or_none_by(ctx.guild_id)
     
     if session is not None:
         return session
     
-    return koe.Session(ctx.bot.koe)
+    # Only new sessions are placed, existing ones stay on their node.
+    return ctx.bot.nodes.new_session()
@@ -8,15 +8,19 @@ from the database associated with that object.
 import lightbulb
 
 from azura.mvc.discord.models import User, Channel, Guild
+from .scope import scoped
 
 
+@scoped
 async def get_user(ctx: lightbulb.Context) -> User:
-    return await User.objects.aget(id=ctx.user.id)
+    return await User.objects.aget_cached(ctx.user.id, create=True)
 
 
+@scoped
 async def get_guild(ctx: lightbulb.Context) -> Guild:
-    return await Guild.objects.aget(id=ctx.guild_id)
+    return await Guild.objects.aget_cached(ctx.guild_id)
 
 
+@scoped
 async def get_channel(ctx: lightbulb.Context) -> Channel:
-    return await Channel.objects.aget(id=ctx.channel_id)
+    return await Channel.objects.aget_cached(ctx.channel_id)
@@ -0,0 +1,63 @@
+"""
+Per-interaction memoization for injection functions.
+
+Lightbulb's command container caches the factories it resolves itself, but
+anything which calls an injection function directly (or goes through a
+second container) would otherwise hit the database again. Wrapping a factory
+with `scoped` ensures that it runs at most once for any given interaction,
+no matter how many hooks or command bodies ask for it.
+
+    * scoped - Decorator memoizing an injection function per interaction
+    * release_scope - POST_INVOKE hook discarding an interaction's memo
+    * get_resolution_stats - Function returning resolution/hit counts for diagnostics
+"""
+import asyncio
+import collections
+import functools
+import typing as t
+
+import hikari
+import lightbulb
+
+from ..metrics import latency
+
+
+_scopes: t.Dict[hikari.Snowflake, t.Dict[str, asyncio.Future]] = {}
+_resolutions: t.Counter[str] = collections.Counter()
+_hits: t.Counter[str] = collections.Counter()
+
+
+def scoped(func: t.Callable[[lightbulb.Context], t.Awaitable[t.Any]]) -> t.Callable:
+    @functools.wraps(func)
+    async def wrapper(ctx: lightbulb.Context) -> t.Any:
+        scope = _scopes.setdefault(ctx.interaction.id, {})
+        name = func.__name__
+
+        if name in scope:
+            _hits[name] += 1
+        else:
+            _resolutions[name] += 1
+            # Storing the future rather than the result means that concurrent
+            # resolutions within the same interaction wait on the first one.
+            scope[name] = asyncio.ensure_future(_timed_resolution(func, ctx))
+        return await scope[name]
+    return wrapper
+
+
+async def _timed_resolution(func: t.Callable[[lightbulb.Context], t.Awaitable[t.Any]], ctx: lightbulb.Context) -> t.Any:
+    with latency.time(ctx.command_data.qualified_name, f"di:{func.__name__}"):
+        return await func(ctx)
+
+
+@lightbulb.hook(lightbulb.ExecutionSteps.POST_INVOKE)
+def release_scope(_: lightbulb.ExecutionPipeline, ctx: lightbulb.Context) -> None:
+    scope = _scopes.pop(ctx.interaction.id, {})
+    for future in scope.values():
+        if not future.done():
+            future.cancel()
+
+
+def get_resolution_stats() -> t.Dict[str, t.Tuple[int, int]]:
+    """Return a mapping of factory name to (resolutions, memo hits)."""
+    names = set(_resolutions.keys()) | set(_hits.keys())
+    return {name: (_resolutions[name], _hits[name]) for name in sorted(names)}
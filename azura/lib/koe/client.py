@@ -1,5 +1,7 @@
 from __future__ import annotations
 import asyncio
+import weakref
+
 import hikari
 import ongaku
 
@@ -7,6 +9,14 @@ from .errors import NXSession, InvalidState, EXSession
 
 
 class KoeClient:
+    """
+    Tracks voice sessions, indexed both by guild and by voice channel.
+
+    Both indexes are only ever changed together, without awaiting in
+    between, so lookups never see one without the other and don't need
+    a lock. Creating and deleting sessions locks only the guild involved,
+    since a voice channel always belongs to exactly one guild.
+    """
     def __init__(
         self,
         bot: hikari.GatewayBot,
@@ -14,30 +24,34 @@ class KoeClient:
     ):
         self.bot = bot
         self.ongaku = ongaku
-        self._sessions: dict[hikari.Snowflake, KoeSession] = {}
-        
-        self.session_lock = asyncio.Lock()
+        self._sessions_by_gid: dict[hikari.Snowflake, KoeSession] = {}
+        self._sessions_by_vid: dict[hikari.Snowflake, KoeSession] = {}
+        # Locks go away once nothing holds or waits on them.
+        self._guild_locks: weakref.WeakValueDictionary[hikari.Snowflake, asyncio.Lock] = weakref.WeakValueDictionary()
     
-    def _get_session_by_gid_unsafe(self, guild_id: hikari.Snowflake) -> KoeSession | None:
-        for session in self._sessions.values():
-                if session.guild_id == guild_id:
-                    return session
-        else:
-            return None
-        
-    async def get_session_by_gid(self, guild_id: hikari.Snowflake, unsafe: bool=False) -> KoeSession | None:
-        if unsafe is True:
-            return self._get_session_by_gid_unsafe(guild_id)
-            
-        async with self.session_lock:
-            return self._get_session_by_gid_unsafe(guild_id)
+    def _guild_lock(self, guild_id: hikari.Snowflake) -> asyncio.Lock:
+        lock = self._guild_locks.get(guild_id)
+        if lock is None:
+            lock = self._guild_locks[guild_id] = asyncio.Lock()
+        return lock
+    
+    def _add_session(self, session: KoeSession) -> None:
+        self._sessions_by_gid[session.guild_id] = session
+        self._sessions_by_vid[session.voice_id] = session
+    
+    def _remove_session(self, session: KoeSession) -> None:
+        self._sessions_by_gid.pop(session.guild_id, None)
+        self._sessions_by_vid.pop(session.voice_id, None)
     
-    async def get_session_by_vid(self, voice_id: hikari.Snowflake, unsafe: bool=False) -> KoeSession | None:
-        if unsafe is True:
-            return self._sessions.get(voice_id, None)
+    @property
+    def sessions(self) -> list[KoeSession]:
+        return list(self._sessions_by_gid.values())
         
-        async with self.session_lock:
-            return self._sessions.get(voice_id, None)
+    async def get_session_by_gid(self, guild_id: hikari.Snowflake) -> KoeSession | None:
+        return self._sessions_by_gid.get(guild_id)
+    
+    async def get_session_by_vid(self, voice_id: hikari.Snowflake) -> KoeSession | None:
+        return self._sessions_by_vid.get(voice_id)
         
     async def create_session(
         self,
@@ -46,16 +60,14 @@ class KoeClient:
         channel_id: hikari.Snowflake,
         connect: bool=False
     ) -> KoeSession:
-        async with self.session_lock:
-            gid_sesh = await self.get_session_by_gid(guild_id, unsafe=True)
-            vid_sesh = await self.get_session_by_vid(voice_id, unsafe=True)
-            if gid_sesh or vid_sesh:
+        async with self._guild_lock(guild_id):
+            if guild_id in self._sessions_by_gid or voice_id in self._sessions_by_vid:
                 raise EXSession(voice_id, "create_session")
             
             session = KoeSession(self, guild_id, voice_id, channel_id)
             if connect is True:
                 await session.join()
-            self._sessions[voice_id] = session
+            self._add_session(session)
             return session
     
     async def del_session(self, vid: hikari.Snowflake | None=None, gid: hikari.Snowflake | None=None) -> KoeSession:
@@ -64,22 +76,25 @@ class KoeClient:
         if vid is not None and gid is not None:
             raise ValueError("Must provide either vid or gid, not both.")
         
-        async with self.session_lock:
-            session = None
-            
+        if gid is None:
+            session = self._sessions_by_vid.get(vid)
+            if session is None:
+                raise NXSession(vid, "del_session")
+            gid = session.guild_id
+        
+        async with self._guild_lock(gid):
+            # Looked up again, since it may have changed while waiting.
             if vid is not None:
-                session = self._sessions.pop(vid, None)
-            if gid is not None:
-                for session in self._sessions.values():
-                    if session.guild_id == gid:
-                        session = self._sessions.pop(session.voice_id, None)
-                        break
+                session = self._sessions_by_vid.get(vid)
+            else:
+                session = self._sessions_by_gid.get(gid)
             
             if session is None:
                 id = vid or gid
                 assert id is not None
                 raise NXSession(id, "del_session")
             
+            self._remove_session(session)
             await session.destroy()
             return session
         
@@ -98,7 +113,7 @@ class KoeSession:
         self.channel_id = channel_id
 
         self.lock = asyncio.Lock()
-        self._player = ongaku.ControllablePlayer | None
+        self._player: ongaku.ControllablePlayer | None = None
     
     @property
     def bot(self) -> hikari.GatewayBot:
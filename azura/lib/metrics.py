@@ -0,0 +1,108 @@
+"""Module defining in-process metrics
+
+Nothing in here leaves the process. The point is to be able to ask azura
+herself where time is being spent, either through /bot stats or through
+the web admin, without needing an external metrics stack.
+
+    * Histogram - Bounded reservoir of samples supporting percentile queries
+    * LatencyRegistry - Collection of histograms keyed by command and stage
+    * latency - The registry used for command execution timings
+"""
+from __future__ import annotations
+
+import collections
+import contextlib
+import threading
+import time
+import typing as t
+
+
+class Histogram:
+    """
+    Bounded reservoir of samples.
+
+    Only the most recent `capacity` samples are kept for percentile
+    calculations, while the count and total cover every observation.
+    """
+    def __init__(self, capacity: int = 2048):
+        self._samples: t.Deque[float] = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.count: int = 0
+        self.total: float = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+
+    def percentile(self, p: float) -> float:
+        return self.percentiles(p)[0]
+
+    def percentiles(self, *ps: float) -> t.Tuple[float, ...]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return tuple(0.0 for _ in ps)
+        return tuple(
+            samples[min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))]
+            for p in ps
+        )
+
+    @property
+    def mean(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+
+class LatencyRegistry:
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        self._histograms: t.Dict[t.Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, stage: str) -> Histogram:
+        with self._lock:
+            try:
+                return self._histograms[(key, stage)]
+            except KeyError:
+                histogram = Histogram(self.capacity)
+                self._histograms[(key, stage)] = histogram
+                return histogram
+
+    def observe(self, key: str, stage: str, seconds: float) -> None:
+        self.get(key, stage).observe(seconds)
+
+    @contextlib.contextmanager
+    def time(self, key: str, stage: str) -> t.Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(key, stage, time.perf_counter() - start)
+
+    def keys(self) -> t.List[str]:
+        with self._lock:
+            return sorted(set(key for key, _ in self._histograms.keys()))
+
+    def stages_for(self, key: str) -> t.Dict[str, Histogram]:
+        with self._lock:
+            return {
+                stage: histogram
+                for (k, stage), histogram in sorted(self._histograms.items())
+                if k == key
+            }
+
+    def summary(self) -> t.Dict[str, t.Dict[str, t.Tuple[int, float, float, float]]]:
+        """Return {key: {stage: (count, p50, p95, p99)}} with times in milliseconds."""
+        summary = {}
+        for key in self.keys():
+            summary[key] = {}
+            for stage, histogram in self.stages_for(key).items():
+                p50, p95, p99 = histogram.percentiles(50, 95, 99)
+                summary[key][stage] = (histogram.count, p50 * 1000, p95 * 1000, p99 * 1000)
+        return summary
+
+
+latency = LatencyRegistry()
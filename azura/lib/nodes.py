@@ -0,0 +1,232 @@
+"""Module defining the Lavalink node pool
+
+Every configured Lavalink node gets its own koe client. Each node's
+/v4/stats endpoint is polled and turned into a penalty, following the
+formula Lavalink recommends to clients: playing players, plus CPU load,
+plus frames the node failed to send. New sessions go to the available
+node with the lowest penalty.
+
+A node that stops answering is marked down. Its sessions are then
+snapshotted and restored on the best remaining node, picking up where
+they left off.
+
+    * Node - Class wrapping a single Lavalink node and its koe client
+    * NodePool - Class placing sessions across nodes and migrating them off failed ones
+"""
+from __future__ import annotations
+
+import asyncio
+import typing as t
+
+import aiohttp
+import hikari
+import koe
+
+from ..core.conf import Config, LavalinkNodeConfig
+from ..core.log import logging
+from .sessions import SessionSnapshot
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("nodes")
+
+# A node must miss this many polls in a row before it is considered down.
+MAX_FAILURES = 3
+
+
+class Node:
+    def __init__(self, bot: hikari.GatewayBot, node_conf: LavalinkNodeConfig):
+        self.conf = node_conf
+        self.koe = koe.Koe(
+            bot,
+            host=node_conf.host,
+            port=node_conf.port,
+            password=node_conf.password,
+        )
+        self.stats: dict[str, t.Any] | None = None
+        self.failures: int = 0
+        # Sessions migrated away which koe still holds, since the node was
+        # gone and couldn't be told. They're hidden from lookups by guild.
+        self._dropped: dict[int, koe.Session] = {}
+
+    @property
+    def name(self) -> str:
+        return self.conf.name
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.conf.ssl else "http"
+        return f"{scheme}://{self.conf.host}:{self.conf.port}"
+
+    @property
+    def available(self) -> bool:
+        return self.failures < MAX_FAILURES
+
+    @property
+    def reachable(self) -> bool:
+        """Whether the node answered its latest stats poll."""
+        return self.stats is not None and self.failures == 0
+
+    @property
+    def penalty(self) -> float:
+        if self.stats is None:
+            return 0.0
+
+        players = self.stats.get("playingPlayers", 0)
+        cpu = 1.05 ** (100 * self.stats.get("cpu", {}).get("systemLoad", 0)) * 10 - 10
+
+        # Frame stats are missing until the node has played anything.
+        frames = self.stats.get("frameStats") or {}
+        deficit = 1.03 ** (500 * frames.get("deficit", 0) / 3000) * 600 - 600
+        nulled = (1.03 ** (500 * frames.get("nulled", 0) / 3000) * 300 - 300) * 2
+        return players + cpu + deficit + nulled
+
+    async def get_session_or_none_by(self, guild_id: hikari.Snowflake) -> koe.Session | None:
+        session = await self.koe.get_session_or_none_by(guild_id=guild_id)
+        dropped = self._dropped.get(int(guild_id))
+        if dropped is None:
+            return session
+        if session is dropped:
+            return None
+        # The stale session is gone, whatever is here now is a new one.
+        del self._dropped[int(guild_id)]
+        return session
+
+    def drop(self, guild_id: hikari.Snowflake, session: koe.Session) -> None:
+        """Stop handing out a session which could not be disconnected."""
+        self._dropped[int(guild_id)] = session
+
+    async def poll(self, http: aiohttp.ClientSession) -> bool:
+        """Fetch the node's stats, returning whether it answered."""
+        try:
+            async with http.get(
+                f"{self.url}/v4/stats",
+                headers={"Authorization": self.conf.password},
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                response.raise_for_status()
+                self.stats = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.failures += 1
+            logger.warning(f"Node {self.name} failed stats poll {self.failures}: {e}")
+            return False
+
+        if not self.available:
+            logger.info(f"Node {self.name} is back up.")
+        self.failures = 0
+        return True
+
+
+class NodePool:
+    def __init__(self, bot: hikari.GatewayBot, node_confs: list[LavalinkNodeConfig]):
+        if not node_confs:
+            raise ValueError("At least one Lavalink node must be configured.")
+        self.bot = bot
+        self.nodes: list[Node] = [Node(bot, node_conf) for node_conf in node_confs]
+        # Which node each guild's session was last found on, so most lookups
+        # ask one node rather than every one in turn.
+        self._node_by_guild: dict[int, Node] = {}
+        self._http: aiohttp.ClientSession | None = None
+
+    @property
+    def primary(self) -> Node:
+        return self.nodes[0]
+
+    @property
+    def reachable(self) -> bool:
+        return any(node.reachable for node in self.nodes)
+
+    def best(self) -> Node:
+        available = [node for node in self.nodes if node.available]
+        if not available:
+            return self.primary
+        return min(available, key=lambda node: node.penalty)
+
+    def node_for(self, session: koe.Session) -> Node | None:
+        for node in self.nodes:
+            if session.koe is node.koe:
+                return node
+        return None
+
+    def new_session(self) -> koe.Session:
+        return koe.Session(self.best().koe)
+
+    async def get_session_or_none_by(self, guild_id: hikari.Snowflake) -> koe.Session | None:
+        known = self._node_by_guild.get(int(guild_id))
+        if known is not None:
+            session = await known.get_session_or_none_by(guild_id)
+            if session is not None:
+                return session
+            del self._node_by_guild[int(guild_id)]
+
+        # Sessions made by new_session() aren't tied to a guild until they
+        # connect, so a miss still has to ask the other nodes.
+        for node in self.nodes:
+            if node is known:
+                continue
+            session = await node.get_session_or_none_by(guild_id)
+            if session is not None:
+                self._node_by_guild[int(guild_id)] = node
+                return session
+        return None
+
+    async def sessions(self) -> t.AsyncIterator[koe.Session]:
+        """
+        Yield every session across every node.
+
+        koe only finds sessions by guild, so this asks after each guild the
+        bot is in, along with any it has left while a session was known there.
+        """
+        guild_ids = set(self._node_by_guild) | set(self.bot.cache.get_guilds_view())
+        for guild_id in guild_ids:
+            session = await self.get_session_or_none_by(hikari.Snowflake(guild_id))
+            if session is not None:
+                yield session
+
+    async def poll(self) -> None:
+        if self._http is None:
+            self._http = aiohttp.ClientSession()
+
+        for node in self.nodes:
+            was_available = node.available
+            await node.poll(self._http)
+            if was_available and not node.available:
+                logger.error(f"Node {node.name} is down, migrating its sessions.")
+                await self.migrate(node)
+
+    async def migrate(self, node: Node) -> None:
+        target = self.best()
+        if target is node:
+            logger.error(f"No other node is available to take over from {node.name}.")
+            return
+
+        me = self.bot.get_me()
+        guild_ids = [
+            guild_id for guild_id, states in self.bot.cache.get_voice_states_view().items()
+            if me is not None and me.id in states
+        ]
+        for guild_id in guild_ids:
+            session = await node.get_session_or_none_by(guild_id)
+            if session is None:
+                continue
+
+            try:
+                snapshot = await SessionSnapshot.take(session)
+                try:
+                    await session.disconnect(user_id=me.id)
+                except koe.errors.KoeError as e:
+                    # The node is gone, so koe may have had no way to let go
+                    # of the session. Make sure it isn't found there again.
+                    logger.warning(f"Failed to disconnect session in {guild_id} from {node.name}: {e}")
+                    node.drop(guild_id, session)
+                await snapshot.restore(self.bot, client=target.koe)
+                self._node_by_guild[int(guild_id)] = target
+            except Exception as e:
+                logger.error(f"Failed to migrate session in {guild_id} to {target.name}: {e}")
+            else:
+                logger.info(f"Migrated session in {guild_id} from {node.name} to {target.name}.")
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
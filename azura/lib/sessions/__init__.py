@@ -0,0 +1,66 @@
+"""
+State and persistence for voice sessions.
+
+Each live session is looked at every second or so, keeping a cache of
+what each guild's player is doing and noticing when a track has changed
+on its own, since no Lavalink events reach azura.
+
+Sessions are checkpointed to a file under azura's root whenever a command
+or the web player touches them, and periodically besides. When azura
+comes back up, whether from a reinit or a crash, each checkpointed session
+is reconnected, its queue reloaded, and playback resumed from where it was.
+
+    * SessionSnapshot - Dataclass holding the compact state of one session
+    * SessionManager - Class debouncing, writing and restoring snapshots
+    * session_manager - The manager used by the bot
+    * PlayerState - Dataclass holding what a player is doing, as last seen on its session
+    * PlayerStateCache - Class keeping a PlayerState per guild, owned by its current session
+    * player_states - The cache kept current by the track watcher
+    * user_volume - Function giving the volume users set on a session, before normalization
+    * ActivityTracker - Class tracking each session's last use and whether its channel is empty
+    * activity - The tracker used by the session reaper
+    * Action - Enum of the actions recorded in a session's history
+    * HistoryRecord - NamedTuple of when an action was taken, and by whom
+    * SessionHistory - Class keeping a session's most recent actions in a ring buffer
+    * HistoryPages - Class paging lazily through a session's history
+    * histories - The per-guild histories behind /history
+    * Preloader - Class caching resolved tracks and warming the files of upcoming ones
+    * preloader - The preloader used for every session
+    * ActionSerializer - Class running a session's actions in order, collapsing bursts
+    * session_actions - The per-guild serializers used by the web player
+    * VoiceIndex - Class mapping each user in voice to their guild and channel
+    * voice_index - The index the web player finds users' sessions with
+"""
+from .actions import ActionRegistry, ActionSerializer, session_actions
+from .activity import ActivityTracker, activity
+from .history import Action, HistoryPages, HistoryRecord, SessionHistory, histories
+from .manager import SessionManager, session_manager
+from .preload import Preloader, preloader
+from .snapshot import SessionSnapshot
+from .state import PlayerState, PlayerStateCache, player_states, user_volume
+from .voice import VoiceIndex, voice_index
+
+
+__all__ = [
+    'SessionManager',
+    'SessionSnapshot',
+    'session_manager',
+    'PlayerState',
+    'PlayerStateCache',
+    'player_states',
+    'user_volume',
+    'ActivityTracker',
+    'activity',
+    'Action',
+    'HistoryPages',
+    'HistoryRecord',
+    'SessionHistory',
+    'histories',
+    'Preloader',
+    'preloader',
+    'ActionRegistry',
+    'ActionSerializer',
+    'session_actions',
+    'VoiceIndex',
+    'voice_index'
+]
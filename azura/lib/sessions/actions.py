@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import dataclasses
+import typing as t
+
+from ...core.conf import Config
+
+
+conf = Config.load()
+
+
+@dataclasses.dataclass
+class PendingAction:
+    key: str
+    factory: t.Callable[[], t.Awaitable[t.Any]]
+    futures: list[asyncio.Future]
+    ready_at: float
+
+
+class ActionSerializer:
+    """
+    Runs the actions taken against one session one at a time, in order.
+
+    Actions which only set something, like volume or seek, can be
+    coalesced. One of those waits `window` seconds before running, and if
+    another with the same key arrives in the meantime, it replaces the
+    waiting one. The replacement goes to the back of the queue, as any
+    newly submitted action would, so it never runs ahead of something
+    submitted before it. Everyone who submitted either gets the result of
+    the last, since that's the one which holds.
+    """
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: t.Deque[PendingAction] = collections.deque()
+        self._coalescable: dict[str, PendingAction] = {}
+        self._worker: asyncio.Task | None = None
+        self.submitted: int = 0
+        self.executed: int = 0
+
+    async def submit(self, key: str, factory: t.Callable[[], t.Awaitable[t.Any]], coalesce: bool = False) -> t.Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.submitted += 1
+
+        pending = self._coalescable.get(key) if coalesce else None
+        if pending is not None:
+            pending.factory = factory
+            pending.futures.append(future)
+            # It keeps its deadline, so a steady stream of replacements
+            # still runs once a window.
+            self._pending.remove(pending)
+            self._pending.append(pending)
+        else:
+            pending = PendingAction(key, factory, [future], loop.time() + (self.window if coalesce else 0))
+            self._pending.append(pending)
+            if coalesce:
+                self._coalescable[key] = pending
+
+        if self._worker is None:
+            self._worker = loop.create_task(self._run())
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                pending = self._pending[0]
+                delay = pending.ready_at - loop.time()
+                if delay > 0:
+                    # A replacement may have moved it back meanwhile, so
+                    # look again at whatever is first.
+                    await asyncio.sleep(delay)
+                    continue
+
+                self._pending.popleft()
+                if self._coalescable.get(pending.key) is pending:
+                    del self._coalescable[pending.key]
+
+                self.executed += 1
+                try:
+                    result = await pending.factory()
+                except Exception as e:
+                    for future in pending.futures:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for future in pending.futures:
+                        if not future.done():
+                            future.set_result(result)
+        finally:
+            self._worker = None
+
+    @property
+    def idle(self) -> bool:
+        return self._worker is None and not self._pending
+
+
+class ActionRegistry:
+    def __init__(self, window: float):
+        self.window = window
+        self._serializers: dict[int, ActionSerializer] = {}
+
+    def get(self, guild_id: int) -> ActionSerializer:
+        guild_id = int(guild_id)
+        serializer = self._serializers.get(guild_id)
+        if serializer is None:
+            serializer = self._serializers[guild_id] = ActionSerializer(self.window)
+        return serializer
+
+    def discard(self, guild_id: int) -> None:
+        serializer = self._serializers.get(int(guild_id))
+        # Anything still queued keeps its serializer until it has run.
+        if serializer is not None and serializer.idle:
+            del self._serializers[int(guild_id)]
+
+
+session_actions = ActionRegistry(conf.lavalink.action_window)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import time
+
+import hikari
+
+
+class ActivityTracker:
+    """
+    Tracks when each guild's session was last used, and since when its
+    voice channel has had nobody but bots in it.
+
+    Occupancy is kept up to date from voice state updates, so deciding
+    whether a session is idle never means walking the voice state cache.
+    """
+    def __init__(self):
+        self._last_active: dict[int, float] = {}
+        self._empty_since: dict[int, float] = {}
+        self.reclaimed: int = 0
+
+    def touch(self, guild_id: int | None) -> None:
+        if guild_id is not None:
+            self._last_active[int(guild_id)] = time.monotonic()
+
+    def forget(self, guild_id: int) -> None:
+        self._last_active.pop(int(guild_id), None)
+        self._empty_since.pop(int(guild_id), None)
+
+    def idle_for(self, guild_id: int) -> float:
+        # A session nobody has touched yet counts from when it was first seen.
+        last_active = self._last_active.setdefault(int(guild_id), time.monotonic())
+        return time.monotonic() - last_active
+
+    def empty_for(self, guild_id: int) -> float:
+        empty_since = self._empty_since.get(int(guild_id))
+        if empty_since is None:
+            return 0.0
+        return time.monotonic() - empty_since
+
+    async def on_voice_state_update(self, event: hikari.VoiceStateUpdateEvent) -> None:
+        bot = event.app
+        me = bot.get_me()
+        if me is None:
+            return
+
+        guild_id = int(event.guild_id)
+        mine = bot.cache.get_voice_state(event.guild_id, me.id)
+        if mine is None or mine.channel_id is None:
+            self.forget(guild_id)
+            return
+
+        listeners = [
+            state for state in bot.cache.get_voice_states_view_for_channel(event.guild_id, mine.channel_id).values()
+            if state.user_id != me.id and not state.member.is_bot
+        ]
+        if listeners:
+            self._empty_since.pop(guild_id, None)
+        else:
+            self._empty_since.setdefault(guild_id, time.monotonic())
+
+
+activity = ActivityTracker()
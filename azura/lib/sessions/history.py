@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import collections
+import datetime
+import enum
+import os
+import time
+import typing as t
+
+import hikari
+
+from ...core.conf import Config
+
+
+conf = Config.load()
+
+
+class Action(enum.IntEnum):
+    CONNECT = 1
+    DISCONNECT = 2
+    PLAY = 3
+    ENQUEUE = 4
+    SKIP = 5
+    STOP = 6
+    PAUSE = 7
+    RESUME = 8
+    VOLUME = 9
+    SEEK = 10
+    REPEAT = 11
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+class HistoryRecord(t.NamedTuple):
+    time: float
+    actor_id: int
+    action: Action
+
+    def get_actor(self, bot: hikari.GatewayBot) -> hikari.User | None:
+        return bot.cache.get_user(self.actor_id)
+
+
+class SessionHistory:
+    """
+    The most recent actions taken in one session.
+
+    Only the last `capacity` records are kept in memory. If a log path is
+    given, every record is also appended to it, so nothing is lost for
+    good when old records fall off the end.
+    """
+    def __init__(self, capacity: int, log_path: str | None = None):
+        self._records: t.Deque[HistoryRecord] = collections.deque(maxlen=capacity)
+        self._log: t.TextIO | None = None
+        if log_path is not None:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            self._log = open(log_path, "a", buffering=1)
+
+    def record(self, actor_id: int, action: Action) -> HistoryRecord:
+        record = HistoryRecord(time.time(), int(actor_id), action)
+        self._records.append(record)
+        if self._log is not None:
+            self._log.write(f"{record.time:.3f} {record.actor_id} {record.action.label}\n")
+        return record
+
+    def newest_first(self) -> list[HistoryRecord]:
+        return list(reversed(self._records))
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class HistoryRegistry:
+    def __init__(self, capacity: int, log_dir: str | None = None):
+        self.capacity = capacity
+        self.log_dir = log_dir
+        self._histories: dict[int, SessionHistory] = {}
+
+    def get(self, guild_id: int) -> SessionHistory:
+        guild_id = int(guild_id)
+        history = self._histories.get(guild_id)
+        if history is None:
+            log_path = os.path.join(self.log_dir, f"{guild_id}.log") if self.log_dir is not None else None
+            history = self._histories[guild_id] = SessionHistory(self.capacity, log_path)
+        return history
+
+    def peek(self, guild_id: int) -> SessionHistory | None:
+        """The guild's history, if it has one, without starting one."""
+        return self._histories.get(int(guild_id))
+
+    def record(self, guild_id: int | None, actor_id: int, action: Action) -> None:
+        if guild_id is None:
+            return
+        # A new connection is a new session, with a history of its own.
+        if action is Action.CONNECT:
+            self.discard(guild_id)
+        self.get(guild_id).record(actor_id, action)
+
+    def discard(self, guild_id: int) -> None:
+        history = self._histories.pop(int(guild_id), None)
+        if history is not None:
+            history.close()
+
+
+histories = HistoryRegistry(
+    conf.lavalink.history_capacity,
+    os.path.join(conf.logs, "history") if conf.lavalink.history_log else None
+)
+
+
+class HistoryPage:
+    def __init__(self, bot: hikari.GatewayBot, records: list[HistoryRecord], number: int, total: int):
+        self.bot = bot
+        self.records = records
+        self.number = number
+        self.total = total
+
+    def get_embed(self) -> hikari.Embed:
+        lines = []
+        for record in self.records:
+            actor = record.get_actor(self.bot)
+            name = actor.display_name if actor is not None else str(record.actor_id)
+            stamp = datetime.datetime.fromtimestamp(record.time, conf.timezone).strftime("%x %X")
+            lines.append(f"[{stamp}] {record.action.label} by {name}")
+
+        embed = hikari.Embed(title="Session History", description="```" + "\n".join(lines) + "```")
+        embed.set_footer(f"Page {self.number + 1} of {self.total}, newest first")
+        return embed
+
+
+class HistoryPages:
+    """
+    Pages over a copy of a session's history, for LazyNavigatorView.
+
+    Only the page being looked at is ever formatted.
+    """
+    def __init__(self, bot: hikari.GatewayBot, history: SessionHistory, per_page: int = 20):
+        self.bot = bot
+        self.records = history.newest_first()
+        self.per_page = per_page
+
+    def __len__(self) -> int:
+        return max(1, -(-len(self.records) // self.per_page))
+
+    async def aget(self, index: int) -> HistoryPage:
+        start = index * self.per_page
+        return HistoryPage(self.bot, self.records[start:start + self.per_page], index, len(self))
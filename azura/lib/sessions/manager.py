@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import typing as t
+
+import hikari
+import orjson as json
+
+from .history import Action, histories
+from .snapshot import SessionSnapshot
+from ...core.conf import Config
+from ...core.log import logging
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("sessions")
+
+# A session which still can't be restored after this many tries is dropped.
+MAX_RESTORE_ATTEMPTS = 30
+
+
+class SessionManager:
+    """
+    Checkpoints voice sessions to disk so they survive a reinit or crash.
+
+    Changes are debounced, so a burst of commands against one session is
+    written once, `delay` seconds after the first of them. Snapshots are
+    taken from the live session at write time, which means a session that
+    has since disconnected is simply dropped.
+    """
+    def __init__(self, path: str, delay: float = 2.0):
+        self.path = path
+        self.delay = delay
+        self._bot: hikari.GatewayBot | None = None
+        self._snapshots: dict[int, SessionSnapshot] = {}
+        self._pending: dict[int, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._write_lock = asyncio.Lock()
+        # Checkpointed sessions which haven't been restored yet. They are
+        # written back with the rest, so a failed restore loses nothing.
+        self._unrestored: dict[int, SessionSnapshot] = {}
+        self._attempts: dict[int, int] = {}
+        self._loaded = False
+
+    def attach_bot(self, bot: hikari.GatewayBot) -> None:
+        self._bot = bot
+
+    @property
+    def bot(self) -> hikari.GatewayBot:
+        if self._bot is None:
+            raise RuntimeError("Session manager used before a bot was attached.")
+        return self._bot
+
+    def mark_dirty(self, guild_id: int | None) -> None:
+        if guild_id is None or not self._loaded or int(guild_id) in self._pending:
+            return
+        guild_id = int(guild_id)
+        loop = asyncio.get_running_loop()
+        self._pending[guild_id] = loop.call_later(self.delay, self._spawn_checkpoint, guild_id)
+
+    def _spawn_checkpoint(self, guild_id: int) -> None:
+        self._pending.pop(guild_id, None)
+        task = asyncio.get_running_loop().create_task(self.checkpoint(guild_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _snapshot(self, guild_id: int) -> bool:
+        """Update a guild's snapshot from its live session, returning whether there was anything to update."""
+        session = await self.bot.nodes.get_session_or_none_by(hikari.Snowflake(guild_id))
+        if session is None or not session._connected:
+            return self._snapshots.pop(guild_id, None) is not None
+
+        try:
+            self._snapshots[guild_id] = await SessionSnapshot.take(session)
+        except Exception as e:
+            logger.warning(f"Failed to snapshot session in {guild_id}: {e}")
+            return False
+        # A live session replaces whatever was waiting to be restored.
+        self._unrestored.pop(guild_id, None)
+        return True
+
+    async def checkpoint(self, guild_id: int) -> None:
+        if await self._snapshot(guild_id):
+            await self._write()
+
+    async def checkpoint_all(self) -> None:
+        """Snapshot every known session, catching playback which moved on by itself."""
+        if not self._loaded:
+            return
+        for guild_id in list(self._snapshots.keys()):
+            await self._snapshot(guild_id)
+        await self._write()
+
+    async def flush(self) -> None:
+        for guild_id, handle in list(self._pending.items()):
+            handle.cancel()
+            self._pending.pop(guild_id, None)
+            await self._snapshot(guild_id)
+        await self.checkpoint_all()
+
+    async def _write(self) -> None:
+        snapshots = {**self._unrestored, **self._snapshots}
+        data = json.dumps({
+            str(guild_id): snapshot.to_dict() for guild_id, snapshot in snapshots.items()
+        })
+
+        def write() -> None:
+            temp = f"{self.path}.tmp"
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, self.path)
+
+        async with self._write_lock:
+            await asyncio.to_thread(write)
+
+    def load(self) -> None:
+        """Read the checkpointed sessions, once, before anything can overwrite them."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            data: dict[str, t.Any] = json.loads(f.read())
+        for snapshot in data.values():
+            snapshot = SessionSnapshot.from_dict(snapshot)
+            self._unrestored[snapshot.guild_id] = snapshot
+
+    @property
+    def unrestored(self) -> int:
+        return len(self._unrestored)
+
+    async def restore(self) -> list[SessionSnapshot]:
+        """
+        Reconnect every checkpointed session, picking up where it left off.
+
+        Sessions which fail to restore are kept, and tried again the next
+        time this is called, up to MAX_RESTORE_ATTEMPTS times.
+        """
+        self.load()
+
+        restored = []
+        for guild_id, snapshot in list(self._unrestored.items()):
+            if guild_id in self._snapshots:
+                # Someone started a new session there in the meantime.
+                del self._unrestored[guild_id]
+                continue
+
+            try:
+                await snapshot.restore(self.bot)
+            except Exception as e:
+                attempts = self._attempts[guild_id] = self._attempts.get(guild_id, 0) + 1
+                if attempts < MAX_RESTORE_ATTEMPTS:
+                    logger.warning(f"Failed to restore session in {guild_id}, will retry: {e}")
+                    continue
+                logger.error(f"Giving up on restoring session in {guild_id} after {attempts} attempts: {e}")
+                del self._unrestored[guild_id]
+                del self._attempts[guild_id]
+                continue
+
+            del self._unrestored[guild_id]
+            self._attempts.pop(guild_id, None)
+            self._snapshots[guild_id] = snapshot
+            # Coming back up is a new session, with a history of its own.
+            histories.record(guild_id, self.bot.get_me().id, Action.CONNECT)
+            restored.append(snapshot)
+
+        await self._write()
+        return restored
+
+
+session_manager = SessionManager(os.path.join(conf.root, "sessions.json"))
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import os
+import typing as t
+
+import hikari
+import koe
+
+from ...core.conf import Config
+from ...core.log import logging
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("preload")
+
+
+def warm_file(path: str) -> bool:
+    """Ask the kernel to start reading a file into the page cache, without waiting for it."""
+    if not hasattr(os, "posix_fadvise") or not os.path.isfile(path):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+class Preloader:
+    """
+    Gets the next tracks in a queue ready before they're needed.
+
+    Resolved tracks are cached by identifier, so enqueueing a song which
+    has been loaded before doesn't go back to Lavalink. The files behind
+    the next `depth` tracks are pulled into the page cache while the
+    current one plays, so Lavalink finds them in memory rather than
+    waiting on the disk when the current track ends.
+    """
+    def __init__(self, depth: int, capacity: int):
+        self.depth = depth
+        self.capacity = capacity
+        self._tracks: t.OrderedDict[str, koe.Track] = collections.OrderedDict()
+        self._bot: hikari.GatewayBot | None = None
+        self._tasks: dict[int, asyncio.Task] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def attach_bot(self, bot: hikari.GatewayBot) -> None:
+        self._bot = bot
+
+    async def load(self, client: koe.Koe, identifier: str) -> koe.Track:
+        track = self._tracks.get(identifier)
+        if track is not None:
+            self._tracks.move_to_end(identifier)
+            self.hits += 1
+            return track
+
+        self.misses += 1
+        track = await client.load_tracks(identifier)
+        if isinstance(track, koe.Track):
+            self._remember(identifier, track)
+        return track
+
+    def forget(self, identifier: str) -> None:
+        """Drop a cached track, so its file's title and artists are read again."""
+        self._tracks.pop(identifier, None)
+
+    def _remember(self, identifier: str, track: koe.Track) -> None:
+        self._tracks[identifier] = track
+        self._tracks.move_to_end(identifier)
+        if len(self._tracks) > self.capacity:
+            self._tracks.popitem(last=False)
+
+    async def preload_next(self, session: koe.Session) -> int:
+        tracks, index = await session.queue.get_all_and_pos()
+        upcoming = tracks[index + 1:index + 1 + self.depth]
+
+        warmed = 0
+        for track in upcoming:
+            identifier = track.info.identifier
+            self._remember(identifier, track)
+            if await asyncio.to_thread(warm_file, identifier):
+                warmed += 1
+        return warmed
+
+    def schedule(self, guild_id: int) -> None:
+        """Preload the next tracks for a guild's session in the background, once at a time."""
+        if self._bot is None or self.depth <= 0:
+            return
+        guild_id = int(guild_id)
+        if guild_id in self._tasks:
+            return
+
+        async def run() -> None:
+            try:
+                session = await self._bot.nodes.get_session_or_none_by(hikari.Snowflake(guild_id))
+                if session is not None:
+                    await self.preload_next(session)
+            except Exception as e:
+                logger.warning(f"Failed to preload next tracks in {guild_id}: {e}")
+
+        task = asyncio.get_running_loop().create_task(run())
+        self._tasks[guild_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(guild_id, None))
+
+
+preloader = Preloader(conf.lavalink.preload_depth, conf.lavalink.track_cache)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import dataclasses
+import typing as t
+
+import hikari
+import koe
+
+from .preload import preloader
+from .state import player_states, user_volume
+
+
+@dataclasses.dataclass
+class SessionSnapshot:
+    """
+    The state of a session, compact enough to write on every change.
+
+    Tracks are kept as their identifiers, which for the cabinet are file
+    paths, since those are what koe loads tracks from.
+    """
+    guild_id: int
+    voice_id: int
+    channel_id: int | None
+    tracks: list[str]
+    index: int
+    position: int
+    volume: int
+    repeat_mode: str
+    paused: bool
+
+    @classmethod
+    async def take(cls, session: koe.Session) -> SessionSnapshot:
+        tracks, index = await session.queue.get_all_and_pos()
+        state = player_states.get_for(session)
+        channel_id = getattr(session, "channel_id", None)
+        return cls(
+            guild_id=int(session.guild_id),
+            voice_id=int(session.voice_id),
+            channel_id=int(channel_id) if channel_id is not None else None,
+            tracks=[track.info.identifier for track in tracks],
+            index=index,
+            position=state.position if state is not None and state.identifier is not None else session._current_track_pos or 0,
+            volume=user_volume(session) if user_volume(session) is not None else 100,
+            repeat_mode=session._repeat_mode.name if session._repeat_mode is not None else "NONE",
+            paused=bool(session._paused)
+        )
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> SessionSnapshot:
+        fields = {field.name for field in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in fields})
+
+    async def restore(self, bot: hikari.GatewayBot, client: koe.Koe | None = None) -> koe.Session:
+        """Reconnect and refill the session, on the given client or on the best available node."""
+        me = bot.get_me()
+        assert me is not None
+
+        if client is None:
+            client = bot.nodes.best().koe
+        session = koe.Session(client)
+        await session.connect(
+            hikari.Snowflake(self.guild_id),
+            hikari.Snowflake(self.voice_id),
+            channel_id=hikari.Snowflake(self.channel_id) if self.channel_id is not None else None,
+            user_id=me.id
+        )
+
+        for identifier in self.tracks:
+            track = await preloader.load(client, identifier)
+            await session.enqueue(track, user_id=me.id)
+
+        # Queue positions are 1-based, the saved index isn't.
+        if self.index > 0:
+            await session.skip(to=self.index + 1, user_id=me.id)
+        # Normalization scales this once the track watcher sees the track.
+        session._user_volume = self.volume
+        await session.set_volume(self.volume, user_id=me.id)
+        await session.set_repeat_mode(koe.RepeatMode[self.repeat_mode])
+        if self.position > 0:
+            await session.seek(millis=self.position, user_id=me.id)
+        if self.paused:
+            await session.set_pause(True, user_id=me.id)
+        player_states.sync(session)
+        return session
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import dataclasses
+import time
+import typing as t
+
+
+# How far the position must go back for a track to count as starting over,
+# so that small corrections to an interpolated position don't.
+RESTART_MARGIN = 5000
+
+
+@dataclasses.dataclass
+class PlayerState:
+    """
+    What a guild's player is doing, as last seen on its session.
+
+    Sessions are only looked at every so often, so the position is carried
+    forward locally from the last look for as long as the track is playing.
+    """
+    guild_id: int
+    # The id() of the session this describes, so a new session in the same
+    # guild never inherits an old one's state.
+    owner: int | None = None
+    identifier: str | None = None
+    title: str | None = None
+    author: str | None = None
+    length: int = 0
+    volume: int | None = None
+    paused: bool = False
+    _position: int = 0
+    _updated_at: float = dataclasses.field(default_factory=time.monotonic)
+
+    @property
+    def playing(self) -> bool:
+        return self.identifier is not None and not self.paused
+
+    @property
+    def position(self) -> int:
+        if not self.playing:
+            return self._position
+        elapsed = int((time.monotonic() - self._updated_at) * 1000)
+        return min(self._position + elapsed, self.length) if self.length else self._position + elapsed
+
+    def set_position(self, position: int) -> None:
+        self._position = position
+        self._updated_at = time.monotonic()
+
+    def set_paused(self, paused: bool) -> None:
+        # Pin the interpolated position before the clock stops or starts.
+        self.set_position(self.position)
+        self.paused = paused
+
+
+def user_volume(session: t.Any) -> int | None:
+    """The volume users set, which normalization scales before Lavalink gets it."""
+    volume = getattr(session, "_user_volume", None)
+    return volume if volume is not None else session._volume
+
+
+class PlayerStateCache:
+    def __init__(self):
+        self._states: dict[int, PlayerState] = {}
+
+    def get(self, guild_id: int) -> PlayerState | None:
+        return self._states.get(int(guild_id))
+
+    def get_for(self, session: t.Any) -> PlayerState | None:
+        """The guild's state, only if it describes this session."""
+        state = self._states.get(int(session.guild_id))
+        if state is None or state.owner != id(session):
+            return None
+        return state
+
+    def _get_or_create_for(self, session: t.Any) -> PlayerState:
+        state = self.get_for(session)
+        if state is None:
+            guild_id = int(session.guild_id)
+            state = self._states[guild_id] = PlayerState(guild_id, owner=id(session))
+        return state
+
+    def sync(self, session: t.Any) -> None:
+        """Record the volume, pause state and position just set on a koe session."""
+        state = self._get_or_create_for(session)
+        if user_volume(session) is not None:
+            state.volume = user_volume(session)
+        if session._paused is not None and session._paused != state.paused:
+            state.set_paused(session._paused)
+        # Seeks and skips move the position without changing anything else
+        # the cache would notice.
+        if session._current_track_pos is not None:
+            state.set_position(session._current_track_pos)
+
+    def observe(self, session: t.Any) -> bool:
+        """
+        Bring the guild's state up to date with its session, returning
+        whether the current track has changed since it was last seen.
+        """
+        state = self._get_or_create_for(session)
+        last_position = state.position
+        self.sync(session)
+        track = session._current_track
+        identifier = track.info.identifier if track is not None else None
+        if identifier == state.identifier:
+            # The same track starting over, on repeat or queued twice in a
+            # row, only shows as the position going backwards.
+            return identifier is not None and state.position < last_position - RESTART_MARGIN
+
+        if track is None:
+            self.on_track_end(state)
+        else:
+            self.on_track_start(state, track, session._current_track_pos or 0)
+        return True
+
+    def discard(self, guild_id: int) -> None:
+        self._states.pop(int(guild_id), None)
+
+    def on_track_start(self, state: PlayerState, track: t.Any, position: int) -> None:
+        state.identifier = track.info.identifier
+        state.title = track.info.title
+        state.author = getattr(track.info, "author", None)
+        state.length = track.info.length
+        state.set_position(position)
+
+    def on_track_end(self, state: PlayerState) -> None:
+        state.identifier = None
+        state.title = None
+        state.author = None
+        state.length = 0
+        state.set_position(0)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __iter__(self) -> t.Iterator[PlayerState]:
+        return iter(list(self._states.values()))
+
+
+player_states = PlayerStateCache()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import typing as t
+
+import hikari
+
+
+class VoiceIndex:
+    """
+    Maps each user in a voice channel to that channel and its guild.
+
+    Kept up to date from voice state updates, and seeded from each guild's
+    voice states when it becomes available, so finding where a user is
+    never means walking every guild's voice states.
+    """
+    def __init__(self):
+        self._channels: dict[int, tuple[int, int]] = {}
+
+    def get(self, user_id: int | None) -> tuple[int, int] | None:
+        if user_id is None:
+            return None
+        return self._channels.get(int(user_id))
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def _set(self, state: hikari.VoiceState) -> None:
+        user_id = int(state.user_id)
+        if state.channel_id is not None:
+            self._channels[user_id] = (int(state.guild_id), int(state.channel_id))
+        # A leave in one guild may arrive after a join in another.
+        elif self._channels.get(user_id, (None,))[0] == int(state.guild_id):
+            del self._channels[user_id]
+
+    def _drop_guild(self, guild_id: int) -> None:
+        guild_id = int(guild_id)
+        for user_id in [u for u, (g, _) in self._channels.items() if g == guild_id]:
+            del self._channels[user_id]
+
+    async def on_voice_state_update(self, event: hikari.VoiceStateUpdateEvent) -> None:
+        self._set(event.state)
+
+    async def on_guild_available(self, event: t.Union[hikari.GuildAvailableEvent, hikari.GuildJoinEvent]) -> None:
+        self._drop_guild(event.guild_id)
+        for state in event.voice_states.values():
+            self._set(state)
+
+    async def on_guild_unavailable(self, event: t.Union[hikari.GuildUnavailableEvent, hikari.GuildLeaveEvent]) -> None:
+        self._drop_guild(event.guild_id)
+
+
+voice_index = VoiceIndex()
@@ -0,0 +1,183 @@
+"""Module defining in-process caches for the MVC
+
+Rows which are read constantly but change rarely can be kept in memory
+here. Every cache is bounded, least-recently-used entries are evicted
+first, and each one keeps hit and miss counts so that its usefulness can
+be checked from /bot stats or the admin.
+
+    * LRUCache - Thread safe, bounded, least-recently-used mapping
+    * CachingManagerMixin - Manager mixin giving a model a read-through cache keyed by primary key
+    * get_cache_stats - Function returning the statistics of every registered cache
+"""
+from __future__ import annotations
+
+import collections
+import threading
+import typing as t
+
+
+class LRUCache:
+    ALL: t.Dict[str, LRUCache] = {}
+
+    def __init__(self, name: str, capacity: int, reverse: bool = False):
+        self.name = name
+        self.capacity = capacity
+        self._data: collections.OrderedDict[t.Hashable, t.Any] = collections.OrderedDict()
+        # Keys by value, for caches which need evict_value(). Values must
+        # then be hashable.
+        self._keys: t.Dict[t.Hashable, t.Set[t.Hashable]] | None = {} if reverse else None
+        # Signal receivers run on whichever thread the ORM happens to be on,
+        # so every access has to be guarded.
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+        LRUCache.ALL[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: t.Hashable, default: t.Any = None) -> t.Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: t.Hashable, value: t.Any) -> None:
+        if self.capacity <= 0:
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._data[key] = value
+            if self._keys is not None:
+                self._keys.setdefault(value, set()).add(key)
+            while len(self._data) > self.capacity:
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key: t.Hashable) -> None:
+        value = self._data.pop(key, None)
+        if self._keys is not None and value is not None:
+            keys = self._keys.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys[value]
+
+    def evict(self, key: t.Hashable) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def evict_value(self, value: t.Any) -> None:
+        if self._keys is None:
+            raise TypeError(f"Cache {self.name} doesn't keep keys by value.")
+        with self._lock:
+            for key in list(self._keys.get(value, ())):
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            if self._keys is not None:
+                self._keys.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+
+class CachingManagerMixin:
+    """
+    Manager mixin adding a read-through cache of `cache_capacity` objects.
+
+    Objects are cached by primary key. Lookups by anything else go through
+    a secondary index mapping the lookup to a primary key. Nothing here
+    invalidates the cache by itself, so models using this must call
+    evict() or clear_cache() from their signal receivers.
+    """
+    def __init__(self, *args, **kwargs):
+        self.cache_capacity: int = kwargs.pop("cache_capacity", 0)
+        self.cache: LRUCache | None = None
+        self.index: LRUCache | None = None
+        super().__init__(*args, **kwargs)
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        if self.cache_capacity > 0 and not cls._meta.abstract:
+            self.cache = LRUCache(cls._meta.label, self.cache_capacity)
+            self.index = LRUCache(f"{cls._meta.label} index", self.cache_capacity, reverse=True)
+
+    def get_cached_queryset(self):
+        """The QuerySet objects are loaded into the cache from. Override to prefetch."""
+        return self.get_queryset()
+
+    def remember(self, obj, lookup: t.Hashable | None = None) -> None:
+        if self.cache is None:
+            return
+        self.cache.put(obj.pk, obj)
+        if lookup is not None:
+            self.index.put(lookup, obj.pk)
+
+    async def aget_cached(self, pk):
+        if self.cache is not None:
+            obj = self.cache.get(pk)
+            if obj is not None:
+                return obj
+
+        obj = await self.get_cached_queryset().aget(pk=pk)
+        self.remember(obj)
+        return obj
+
+    async def aget_cached_by(self, **lookup):
+        key = tuple(sorted(lookup.items()))
+        if self.index is not None:
+            pk = self.index.get(key)
+            if pk is not None:
+                return await self.aget_cached(pk)
+
+        obj = await self.get_cached_queryset().aget(**lookup)
+        self.remember(obj, key)
+        return obj
+
+    async def ain_bulk_cached(self, pks: t.Iterable) -> t.Dict:
+        found, missing = {}, []
+        for pk in pks:
+            obj = self.cache.get(pk) if self.cache is not None else None
+            if obj is None:
+                missing.append(pk)
+            else:
+                found[pk] = obj
+
+        if missing:
+            for pk, obj in (await self.get_cached_queryset().ain_bulk(missing)).items():
+                self.remember(obj)
+                found[pk] = obj
+        return found
+
+    def evict(self, pk) -> None:
+        if self.cache is None:
+            return
+        self.cache.evict(pk)
+        self.index.evict_value(pk)
+
+    def clear_cache(self) -> None:
+        if self.cache is None:
+            return
+        self.cache.clear()
+        self.index.clear()
+
+
+def get_cache_stats() -> t.Dict[str, t.Tuple[int, int, int, int, float]]:
+    """Return {name: (size, capacity, hits, misses, hit ratio)} for every cache."""
+    return {
+        name: (len(cache), cache.capacity, cache.hits, cache.misses, cache.hit_ratio)
+        for name, cache in sorted(LRUCache.ALL.items())
+    }
@@ -1,23 +1,160 @@
+"""Module defining database backups
+
+Backups are taken online, without blocking the event loop. For SQLite
+the backup API copies the database a batch of pages at a time on a worker
+thread, so writers are only ever held up for one batch. For PostgreSQL,
+pg_dump runs as an asynchronous subprocess. In either case the output is
+compressed as it is written, using zstd if `zstandard` is installed and
+gzip otherwise, and lands in conf.mvc.database.backup_dir under a
+temporary name until it is complete.
+
+The SQLite backup API can only write to another database, so that copy
+has to exist uncompressed before it can be compressed. A backup is
+refused up front if there isn't room for it, rather than filling the
+disk the live database sits on partway through.
+
+    * backup_database - Coroutine taking a compressed backup, returning its path
+    * prune_backups - Function applying the retention policy to backups with a given prefix
+    * get_backups - Function listing backups with a given prefix, newest first
+"""
+import asyncio
+import errno
 import os
+import pathlib
+import shutil
+import sqlite3
+import tempfile
+import typing as t
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 from ...core.conf import Config
+from ...lib.utils import utcnow
 
 
 conf = Config.load()
 
+CHUNK_SIZE = 1 << 20
+
+
+def _compressor() -> t.Tuple[str, t.Any]:
+    level = conf.mvc.database.backup.compression_level
+    if zstandard is not None:
+        return ".zst", zstandard.ZstdCompressor(level=level).compressobj()
+    # wbits=31 gives a gzip container rather than a bare zlib stream.
+    return ".gz", zlib.compressobj(min(level, 9), zlib.DEFLATED, 31)
+
+
+def _ensure_space(directory: pathlib.Path, size: int) -> None:
+    free = shutil.disk_usage(directory).free
+    if free < size:
+        raise OSError(errno.ENOSPC, f"Backing up needs {size} bytes free in {directory}, only {free} are.")
+
+
+def _backup_sqlite(path: pathlib.Path) -> None:
+    _, compressor = _compressor()
+
+    # The uncompressed copy is about the size of the database and its WAL.
+    # The compressed one is written alongside it, and is usually far smaller.
+    database = pathlib.Path(conf.mvc.database.path)
+    wal = database.with_name(database.name + "-wal")
+    size = database.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+    _ensure_space(pathlib.Path(conf.mvc.database.backup_dir), size)
+
+    with tempfile.NamedTemporaryFile(dir=conf.mvc.database.backup_dir, suffix=".sqlite3") as snapshot:
+        source = sqlite3.connect(conf.mvc.database.path)
+        target = sqlite3.connect(snapshot.name)
+        try:
+            # Copying a batch of pages at a time means writers are only held
+            # off for one batch, rather than for the whole copy.
+            source.backup(target, pages=conf.mvc.database.backup.pages_per_step, sleep=0.005)
+        finally:
+            target.close()
+            source.close()
+
+        with open(snapshot.name, "rb") as infile, open(path, "wb") as outfile:
+            while chunk := infile.read(CHUNK_SIZE):
+                outfile.write(compressor.compress(chunk))
+            outfile.write(compressor.flush())
+
+
+async def _backup_postgresql(path: pathlib.Path) -> None:
+    _, compressor = _compressor()
+    db = conf.mvc.database
+
+    process = await asyncio.create_subprocess_exec(
+        "pg_dump",
+        "-h", db.host,
+        "-p", str(db.port),
+        "-U", db.user,
+        "-w",
+        db.name,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, "PGPASSWORD": db.password}
+    )
+
+    def write(data: bytes) -> None:
+        outfile.write(compressor.compress(data))
+
+    # stderr is drained alongside stdout, since pg_dump blocks once either
+    # pipe fills up.
+    stderr = asyncio.create_task(process.stderr.read())
+    try:
+        with open(path, "wb") as outfile:
+            while chunk := await process.stdout.read(CHUNK_SIZE):
+                await asyncio.to_thread(write, chunk)
+            outfile.write(compressor.flush())
+
+        if await process.wait() != 0:
+            raise RuntimeError(f"pg_dump exited with code {process.returncode}: {(await stderr).decode().strip()}")
+    finally:
+        # Whether this failed or was cancelled, pg_dump mustn't outlive it.
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        stderr.cancel()
+
+
+def _suffix() -> str:
+    ext = ".sqlite3" if conf.mvc.database.backend == "sqlite" else ".sql"
+    return ext + _compressor()[0]
+
+
+async def backup_database(prefix: str = "manual") -> pathlib.Path:
+    os.makedirs(conf.mvc.database.backup_dir, exist_ok=True)
+    name = utcnow().strftime(f"{prefix}_backup_%Y_%m_%d_%H_%M_%S") + _suffix()
+    path = pathlib.Path(conf.mvc.database.backup_dir) / name
+    partial = path.with_name(f".{name}.partial")
+
+    try:
+        if conf.mvc.database.backend == "sqlite":
+            await asyncio.to_thread(_backup_sqlite, partial)
+        else:
+            await _backup_postgresql(partial)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    os.replace(partial, path)
+    return path
+
+
+def get_backups(prefix: str) -> t.List[pathlib.Path]:
+    directory = pathlib.Path(conf.mvc.database.backup_dir)
+    if not directory.exists():
+        return []
+    backups = [path for path in directory.glob(f"{prefix}_backup_*") if path.is_file()]
+    return sorted(backups, key=lambda path: path.stat().st_mtime, reverse=True)
+
 
-def dump_database(fname: str) -> bool:
-    userpath = os.path.expanduser("~/")
-    if not os.path.exists(os.path.join(userpath, ".pgpass")):
-        with open(os.path.join(userpath, ".pgpass"), "w") as pgpassfile:
-            pgpassfile.write(f"{conf.mvc.db_host}:{conf.mvc.db_port}:{conf.mvc.database.name}:{conf.mvc.database.user}:{conf.mvc.database.password}")
-        os.system(f"chmod 600 {os.path.join(userpath, '.pgpass')}")
-    else:
-        with open(os.path.join(userpath, ".pgpass"), "r") as pgpassfile:
-            lines = pgpassfile.readlines()
-        if f"{conf.mvc.database.host}:{conf.mvc.database.port}:{conf.mvc.database.name}:{conf.mvc.database.user}:{conf.mvc.database.password}" not in lines:
-            with open(os.path.join(userpath, ".pgpass"), "a") as pgpassfile:
-                pgpassfile.write(f"{conf.mvc.database.host}:{conf.mvc.database.port}:{conf.mvc.database.name}:{conf.mvc.database.user}:{conf.mvc.database.password}")
-
-    os.system(f"pg_dump -U {conf.mvc.database.user} -h {conf.mvc.database.host} -p {conf.mvc.database.port} {conf.mvc.database.name} -w >> {os.path.join(conf.mvc.database.backup_dir, fname)}")
-    return True
\ No newline at end of file
+def prune_backups(prefix: str, keep: int) -> t.List[pathlib.Path]:
+    removed = []
+    for path in get_backups(prefix)[max(0, keep):]:
+        path.unlink(missing_ok=True)
+        removed.append(path)
+    return removed
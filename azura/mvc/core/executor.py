@@ -0,0 +1,114 @@
+"""Module defining the database execution layer
+
+Django's async ORM hands every call to `sync_to_async` with
+`thread_sensitive=True`, which places all of them on the same thread. With
+the gateway, the web player and the daemons all hitting the database, one
+slow write would hold up every read behind it. Instead, reads are spread
+over a small pool of threads, each holding its own connection, while
+writes are funneled through a single writer thread so that SQLite never
+sees two writers contend for the lock. PostgreSQL has no such limit, so
+there the writer gets several threads of its own.
+
+    * Pool - Thread pool running ORM calls, keeping queue depth and wait time metrics
+    * read - Coroutine running a callable on the read pool
+    * write - Coroutine running a callable on the writer
+    * get_executor_stats - Function returning the statistics of both pools
+    * shutdown - Function waiting for queued calls and stopping both pools
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+import typing as t
+
+from django import db
+
+from ...core.conf import Config
+from ...lib.metrics import Histogram
+
+
+conf = Config.load()
+
+
+class Pool:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix=f"azura-db-{name}"
+        )
+        self._lock = threading.Lock()
+        self.depth: int = 0
+        self.peak: int = 0
+        self.wait = Histogram()
+        self.runtime = Histogram()
+
+    def _enqueued(self) -> None:
+        with self._lock:
+            self.depth += 1
+            self.peak = max(self.peak, self.depth)
+
+    def _dequeued(self) -> None:
+        with self._lock:
+            self.depth -= 1
+
+    def _call(self, enqueued_at: float, func: t.Callable, args: tuple, kwargs: dict) -> t.Any:
+        started = time.perf_counter()
+        self._dequeued()
+        self.wait.observe(started - enqueued_at)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.runtime.observe(time.perf_counter() - started)
+            # Connections belong to the worker thread, so the usual
+            # request_finished handling never reaches them.
+            db.close_old_connections()
+
+    async def run(self, func: t.Callable, *args, **kwargs) -> t.Any:
+        self._enqueued()
+        future = self._executor.submit(self._call, time.perf_counter(), func, args, kwargs)
+        # A call cancelled before it starts never reaches _call().
+        future.add_done_callback(lambda f: self._dequeued() if f.cancelled() else None)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_reader = Pool("read", max(1, conf.mvc.database.read_workers))
+_writer = Pool("write", 1 if conf.mvc.database.backend == "sqlite" else max(1, conf.mvc.database.write_workers))
+
+
+async def read(func: t.Callable, *args, **kwargs) -> t.Any:
+    return await _reader.run(func, *args, **kwargs)
+
+
+async def write(func: t.Callable, *args, **kwargs) -> t.Any:
+    return await _writer.run(func, *args, **kwargs)
+
+
+def get_executor_stats() -> t.Dict[str, t.Tuple[int, int, int, float, float, float, float]]:
+    """Return {pool: (workers, depth, peak depth, wait p50, wait p95, run p50, run p95)} with times in milliseconds."""
+    stats = {}
+    for pool in (_reader, _writer):
+        wait50, wait95 = pool.wait.percentiles(50, 95)
+        run50, run95 = pool.runtime.percentiles(50, 95)
+        stats[pool.name] = (
+            pool.workers,
+            pool.depth,
+            pool.peak,
+            wait50 * 1000,
+            wait95 * 1000,
+            run50 * 1000,
+            run95 * 1000
+        )
+    return stats
+
+
+def shutdown() -> None:
+    _writer.shutdown()
+    _reader.shutdown()
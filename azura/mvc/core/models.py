@@ -1,14 +1,106 @@
-from asgiref.sync import sync_to_async
 from django.db import models
 
+from . import executor
+from .cache import CachingManagerMixin
+
+
+class BaseAsyncQuerySet(models.QuerySet):
+    """
+    QuerySet sending its async methods through the database executor.
+
+    Reads go to the read pool and anything which may write goes to the
+    writer. The async methods of related managers (aadd(), aclear() and
+    so on) are defined by Django itself and still use sync_to_async.
+    """
+    def __aiter__(self):
+        async def generator():
+            await executor.read(self._fetch_all)
+            for item in self._result_cache:
+                yield item
+        return generator()
+
+    async def aget(self, *args, **kwargs):
+        return await executor.read(self.get, *args, **kwargs)
+
+    async def acount(self):
+        return await executor.read(self.count)
+
+    async def aexists(self):
+        return await executor.read(self.exists)
+
+    async def acontains(self, obj):
+        return await executor.read(self.contains, obj)
+
+    async def afirst(self):
+        return await executor.read(self.first)
+
+    async def alast(self):
+        return await executor.read(self.last)
+
+    async def aearliest(self, *fields):
+        return await executor.read(self.earliest, *fields)
+
+    async def alatest(self, *fields):
+        return await executor.read(self.latest, *fields)
+
+    async def ain_bulk(self, *args, **kwargs):
+        return await executor.read(self.in_bulk, *args, **kwargs)
+
+    async def aaggregate(self, *args, **kwargs):
+        return await executor.read(self.aggregate, *args, **kwargs)
+
+    async def aexplain(self, *args, **kwargs):
+        return await executor.read(self.explain, *args, **kwargs)
+
+    async def acreate(self, **kwargs):
+        return await executor.write(self.create, **kwargs)
+
+    async def aget_or_create(self, *args, **kwargs):
+        return await executor.write(self.get_or_create, *args, **kwargs)
+
+    async def aupdate_or_create(self, *args, **kwargs):
+        return await executor.write(self.update_or_create, *args, **kwargs)
+
+    async def abulk_create(self, *args, **kwargs):
+        return await executor.write(self.bulk_create, *args, **kwargs)
+
+    async def abulk_update(self, *args, **kwargs):
+        return await executor.write(self.bulk_update, *args, **kwargs)
+
+    async def aupdate(self, **kwargs):
+        return await executor.write(self.update, **kwargs)
+
+    async def adelete(self):
+        return await executor.write(self.delete)
+
+    acreate.alters_data = True
+    aget_or_create.alters_data = True
+    aupdate_or_create.alters_data = True
+    abulk_create.alters_data = True
+    abulk_update.alters_data = True
+    aupdate.alters_data = True
+    adelete.alters_data = True
+    adelete.queryset_only = True
+
+
+BaseAsyncManager = models.Manager.from_queryset(BaseAsyncQuerySet)
+
+
+class CachingAsyncManager(CachingManagerMixin, BaseAsyncManager):
+    pass
+
 
 class BaseAsyncModel(models.Model):
+    objects = BaseAsyncManager()
 
     class Meta:
         abstract = True
-    
+
     async def asave(self, *args, **kwargs):
-        return await sync_to_async(super().save)(*args, **kwargs)
-    
+        return await executor.write(super().save, *args, **kwargs)
+
     async def adelete(self, *args, **kwargs):
-        return await sync_to_async(super().delete)(*args, **kwargs)
\ No newline at end of file
+        return await executor.write(super().delete, *args, **kwargs)
+
+    async def arefresh_from_db(self, *args, **kwargs):
+        return await executor.read(super().refresh_from_db, *args, **kwargs)
@@ -92,13 +92,59 @@ WSGI_APPLICATION = "azura.mvc.core.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": conf.mvc.database.path
-    }
+# Applied to every connection as it is opened. WAL lets the executor's read
+# pool carry on while the writer commits, and synchronous=NORMAL is still
+# crash-safe under WAL. mmap_size is in bytes, a negative cache_size is in
+# KiB and busy_timeout is in milliseconds.
+SQLITE_PRAGMAS = {
+    "journal_mode": conf.mvc.database.sqlite.journal_mode,
+    "synchronous": conf.mvc.database.sqlite.synchronous,
+    "mmap_size": conf.mvc.database.sqlite.mmap_size,
+    "cache_size": conf.mvc.database.sqlite.cache_size,
+    "busy_timeout": conf.mvc.database.sqlite.busy_timeout,
 }
 
+if conf.mvc.database.backend == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": conf.mvc.database.path,
+            # A negative conn_max_age keeps connections open for the lifetime
+            # of the thread holding them.
+            "CONN_MAX_AGE": None if conf.mvc.database.conn_max_age < 0 else conf.mvc.database.conn_max_age,
+            "OPTIONS": {
+                "init_command": ";".join(f"PRAGMA {k}={v}" for k, v in SQLITE_PRAGMAS.items()),
+                "timeout": conf.mvc.database.sqlite.busy_timeout / 1000,
+                # Take the write lock up front rather than failing to upgrade a
+                # read transaction while another connection is writing.
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+elif conf.mvc.database.backend == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": conf.mvc.database.name,
+            "USER": conf.mvc.database.user,
+            "PASSWORD": conf.mvc.database.password,
+            "HOST": conf.mvc.database.host,
+            "PORT": conf.mvc.database.port,
+            # Connections are handed back to the psycopg pool after each
+            # call instead, which is incompatible with persistent ones.
+            "CONN_MAX_AGE": 0,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": conf.mvc.database.pool_min_size,
+                    "max_size": conf.mvc.database.pool_max_size,
+                    "timeout": conf.mvc.database.pool_timeout,
+                },
+            },
+        }
+    }
+else:
+    raise RuntimeError(f"Unknown database backend '{conf.mvc.database.backend}', expected 'sqlite' or 'postgresql'.")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -18,7 +18,7 @@ from django.views.generic.base import RedirectView
 from django.urls import path, include, re_path
 from django.conf.urls.static import static
 from django.conf import settings
-from .views import index, auth, protected_file
+from .views import index, auth, protected_file, stats
 from ...core.conf import Config
 
 
@@ -35,6 +35,7 @@ urlpatterns = [
     path("", index),
     path("auth/", auth),
     path("music/", include("azura.mvc.music.urls")),
+    path("admin/stats/", stats),
     path("admin/", admin.site.urls),
     
     re_path('^uploads/cabinet/.+', protected_file, name='protected_file'),
@@ -1,11 +1,16 @@
 from asgiref.sync import sync_to_async
-from django.shortcuts import redirect
+from django.shortcuts import redirect, render
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.http import HttpRequest, HttpResponse, HttpResponseNotFound, FileResponse
 from django.conf import settings
 import os
 
 from ...core.conf import Config
+from ...lib.metrics import latency
+from .cache import get_cache_stats
+from .executor import get_executor_stats
 from ..core.oauth2 import decrypt_state
 from .utils import template
 
@@ -43,4 +48,14 @@ def protected_file(request: HttpRequest) -> HttpResponse | FileResponse:
     
     response = FileResponse(open(file, "rb"))
     response['Content-Disposition'] = "attachment; filename=" + str(file).split("/")[-1]
-    return response
\ No newline at end of file
+    return response
+
+
+@staff_member_required
+def stats(request: HttpRequest) -> HttpResponse:
+    context = admin.site.each_context(request)
+    context['title'] = "Statistics"
+    context['summary'] = latency.summary()
+    context['caches'] = get_cache_stats()
+    context['pools'] = get_executor_stats()
+    return render(request, "stats.html", context)
@@ -1,9 +1,11 @@
 from django.db import models
+from django.dispatch import receiver
 
-from ...core.models import BaseAsyncModel
+from ...core import executor
+from ...core.cache import CachingManagerMixin, LRUCache
+from ...core.models import BaseAsyncModel, BaseAsyncQuerySet
 from ..fields import BaseIDField
 
-from asgiref.sync import sync_to_async
 import inspect
 
 
@@ -63,7 +65,7 @@ def qs_inject_bot(func):
     return wrapper
 
 
-class DiscordQuerySet(models.query.QuerySet):
+class DiscordQuerySet(BaseAsyncQuerySet):
     def __init__(self, *args, **kwargs):
         self._bot = kwargs.pop('bot', None)
         self.only_valid = kwargs.pop('only_valid', [])
@@ -85,7 +87,7 @@ class DiscordQuerySet(models.query.QuerySet):
     
     def __aiter__(self):
         async def generator():
-            await sync_to_async(self._fetch_all)()
+            await executor.read(self._fetch_all)
             for item in self._result_cache:
                 item = self.attach_bot_to(item)
                 if self.resolve is True:
@@ -105,13 +107,34 @@ def inject_bot(func):
     return inner
 
 
-class DiscordBaseManager(models.Manager):
+class DiscordBaseManager(CachingManagerMixin, models.Manager):
     def __init__(self, *args, **kwargs):
         self._bot = kwargs.pop('bot', None)
         self.only_valid = kwargs.pop('only_valid', [])
         self.resolve = kwargs.pop('resolve', False)
         super().__init__(*args, **kwargs)
 
+    async def aget_cached(self, pk, create=False):
+        """
+        Get an object by primary key, going through the identity map.
+
+        Objects returned from here are shared between every caller, and are
+        kept current by the post_save and post_delete receivers below.
+        Changes made with QuerySet.update() bypass those, and will not be
+        seen until the object is evicted.
+        """
+        if create is False:
+            return await super().aget_cached(pk)
+
+        if self.cache is not None:
+            obj = self.cache.get(pk)
+            if obj is not None:
+                return obj
+
+        obj, _ = await self.aget_or_create(pk=pk)
+        self.remember(obj)
+        return obj
+
     @inject_bot
     def filter(self, *args, **kwargs):
         return super().filter(*args, **kwargs)
@@ -207,4 +230,29 @@ class DiscordBaseModel(BaseAsyncModel):
     def bot(self):
         if self._bot is None:
             raise ValueError("Bot attribute not set.")
-        return self._bot
\ No newline at end of file
+        return self._bot
+
+
+def _get_identity_map(sender) -> LRUCache | None:
+    if not issubclass(sender, DiscordBaseModel):
+        return None
+    return getattr(sender.objects, "cache", None)
+
+
+@receiver(models.signals.post_save)
+def write_through_identity_map(sender, instance, **kwargs):
+    cache = _get_identity_map(sender)
+    if cache is None:
+        return
+
+    if instance.get_deferred_fields():
+        cache.evict(instance.pk)
+    else:
+        cache.put(instance.pk, instance)
+
+
+@receiver(models.signals.post_delete)
+def evict_from_identity_map(sender, instance, **kwargs):
+    cache = _get_identity_map(sender)
+    if cache is not None:
+        cache.evict(instance.pk)
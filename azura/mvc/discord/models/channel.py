@@ -1,6 +1,10 @@
 from django.db import models
-from .base import DiscordBaseModel
+from .base import DiscordBaseManager, DiscordBaseModel
 from ..fields import ChannelIDField, ChannelTypeField
+from ....core.conf import Config
+
+
+conf = Config.load()
 
 
 class Channel(DiscordBaseModel):
@@ -8,6 +12,8 @@ class Channel(DiscordBaseModel):
     type = ChannelTypeField(help_text="The type of channel this is.")
     guild = models.ForeignKey("discord.Guild", on_delete=models.CASCADE, related_name="channels_guild", help_text="The guild this channel belongs to.")
 
+    objects = DiscordBaseManager(cache_capacity=conf.mvc.cache.channels)
+
     @property
     def obj(self):
         try:
@@ -1,16 +1,22 @@
 import zoneinfo
 
-from .base import DiscordBaseModel
+from .base import DiscordBaseManager, DiscordBaseModel
 from ..fields import GuildIDField
 from ...core.fields import TimezoneField
 from .user import User
+from azura.core.conf import Config
 from azura.lib.utils import utcnow
 
 
+conf = Config.load()
+
+
 class Guild(DiscordBaseModel):
     id = GuildIDField(primary_key=True, help_text="The Discord ID of this guild.")
     timezone = TimezoneField(help_text="The timezone in which this guild operates.")
 
+    objects = DiscordBaseManager(cache_capacity=conf.mvc.cache.guilds)
+
     @property
     def obj(self):
         try:
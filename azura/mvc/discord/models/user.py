@@ -1,14 +1,20 @@
 import datetime
 from django.db import models
+from django.dispatch import receiver
 import zoneinfo
 
-from .base import DiscordBaseModel
+from .base import DiscordBaseManager, DiscordBaseModel
+from .permissions import PermissionsObject
 from ...core.fields import TimezoneField
 from ..fields import UserIDField
+from ....core.conf import Config
 from ....lib.permissions import PermissionState
 from ....lib.utils import utcnow
 
 
+conf = Config.load()
+
+
 epoch = datetime.datetime(year=1970, month=1, day=1, hour=0, minute=0, second=0)
 
 
@@ -18,6 +24,8 @@ class User(DiscordBaseModel):
     _name = models.CharField(max_length=128, unique=True, blank=True, null=True)
     timezone = TimezoneField()
 
+    objects = DiscordBaseManager(cache_capacity=conf.mvc.cache.users)
+
     @property
     def localnow(self) -> datetime.datetime:
         return utcnow().astimezone(zoneinfo.ZoneInfo(self.timezone))
@@ -34,10 +42,18 @@ class User(DiscordBaseModel):
             raise ValueError("resolve_all() must be called before accessing.")
     
     async def get_acl(self, root):
+        # Users live in the identity map, so the raw ACL is kept alongside
+        # them. The receivers below drop the user whenever it changes.
+        if getattr(self, "_acl_settings", None) is None:
+            settings = []
+            async for obj in self.acl.all():
+                settings.append((obj.node, obj.setting))
+            self._acl_settings = settings
+
         acl = {}
-        async for obj in self.acl.all():
-            node = root.get_node(obj.node)
-            setting = PermissionState.DENY if obj.setting == "-" else PermissionState.ALLOW
+        for node, setting in self._acl_settings:
+            node = root.get_node(node)
+            setting = PermissionState.DENY if setting == "-" else PermissionState.ALLOW
             acl[node] = setting
         return acl 
     
@@ -55,4 +71,22 @@ class User(DiscordBaseModel):
         acl = {}
         async for obj in self.acl.all():
             acl[obj.node] = obj.setting
-        return acl
\ No newline at end of file
+        return acl
+
+
+@receiver(models.signals.m2m_changed, sender=User.acl.through)
+def evict_user_on_acl_change(sender, instance, **kwargs):
+    if User.objects.cache is None:
+        return
+
+    if isinstance(instance, User):
+        User.objects.cache.evict(instance.pk)
+    else:
+        User.objects.cache.clear()
+
+
+@receiver(models.signals.post_save, sender=PermissionsObject)
+@receiver(models.signals.post_delete, sender=PermissionsObject)
+def evict_users_on_permissions_change(sender, instance, **kwargs):
+    if User.objects.cache is not None:
+        User.objects.cache.clear()
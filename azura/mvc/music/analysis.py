@@ -0,0 +1,185 @@
+"""Module defining audio analysis
+
+Decoding a whole file to measure its loudness takes seconds of CPU, so
+it runs on a process pool rather than in the bot's own process. Everything
+which runs in the pool is kept free of Django, so the workers never need
+to set it up.
+
+    * analyze - Function measuring a file, run inside the pool
+    * read_track - Function hashing, reading and copying a file for import, run inside a pool
+    * write_peaks - Function decoding a file into the waveform peaks stored beside it, run inside the pool
+    * peaks_path - Function returning where a file's waveform peaks are stored
+    * analyze_song - Coroutine analyzing a song in the pool and storing the results
+    * schedule_analysis - Function analyzing a song in the background
+    * get_pool - Function returning the shared process pool
+"""
+from __future__ import annotations
+
+import array
+import asyncio
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+import typing as t
+
+import music_tag
+
+from ...core.conf import Config
+from ...core.log import logging
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("analysis")
+
+LOUDNESS = re.compile(r"I:\s+(-?[\d.]+|-inf) LUFS")
+
+# Peaks are one byte each, 0 to 127, taken from audio decoded at a low
+# sample rate, since they only need to be accurate to a pixel or so.
+PEAK_BUCKETS = 1000
+PEAK_SAMPLE_RATE = 4000
+
+_pool: concurrent.futures.ProcessPoolExecutor | None = None
+_tasks: set[asyncio.Task] = set()
+
+
+def measure_loudness(path: str) -> float | None:
+    """Measure integrated loudness (EBU R128) in LUFS with ffmpeg, if it's installed."""
+    if shutil.which("ffmpeg") is None:
+        return None
+
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", path, "-af", "ebur128", "-f", "null", "-"],
+        capture_output=True,
+        text=True
+    )
+    # The summary comes last, after a line for every 100ms of audio.
+    matches = LOUDNESS.findall(result.stderr)
+    if result.returncode != 0 or not matches or matches[-1] == "-inf":
+        return None
+    return float(matches[-1])
+
+
+def analyze(path: str, loudness: bool = True) -> dict[str, t.Any]:
+    f = music_tag.load_file(path)
+    length = f["#length"].value
+    bitrate = f["#bitrate"].value
+    sample_rate = f["#samplerate"].value
+    codec = f["#codec"].value
+
+    return {
+        'duration': int(length * 1000) if length else None,
+        'bitrate': int(bitrate) if bitrate else None,
+        'sample_rate': int(sample_rate) if sample_rate else None,
+        'codec': str(codec or "")[:32],
+        'loudness': measure_loudness(path) if loudness else None,
+    }
+
+
+def read_track(path: str, cabinet: str, loudness: bool = False) -> dict[str, t.Any]:
+    """
+    Hash, tag-read and analyze a file, copying it into the cabinet directory
+    under its hash if it isn't there already.
+    """
+    with open(path, "rb") as f:
+        sha256 = hashlib.file_digest(f, "sha256").hexdigest()
+
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    destination = os.path.join(cabinet, f"{sha256}.{ext}")
+    if not os.path.exists(destination):
+        os.makedirs(cabinet, exist_ok=True)
+        partial = f"{destination}.partial"
+        shutil.copyfile(path, partial)
+        os.replace(partial, destination)
+
+    f = music_tag.load_file(path)
+    return {
+        'sha256': sha256,
+        'ext': ext,
+        'name': str(f["title"]).strip() or os.path.splitext(os.path.basename(path))[0],
+        'artists': [str(name).strip() for name in f["artist"].values if str(name).strip()],
+        **analyze(path, loudness=loudness),
+    }
+
+
+def peaks_path(path: str) -> str:
+    return f"{path}.peaks"
+
+
+def compute_peaks(path: str, buckets: int = PEAK_BUCKETS) -> bytes | None:
+    if shutil.which("ffmpeg") is None:
+        return None
+
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-nostats", "-v", "error", "-i", path,
+            "-ac", "1", "-ar", str(PEAK_SAMPLE_RATE), "-f", "s16le", "-"
+        ],
+        capture_output=True
+    )
+    if result.returncode != 0 or not result.stdout:
+        return None
+
+    samples = array.array("h")
+    samples.frombytes(result.stdout[:len(result.stdout) // 2 * 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+
+    step = len(samples) / buckets
+    peaks = bytearray(buckets)
+    for i in range(buckets):
+        bucket = samples[int(i * step):int((i + 1) * step)]
+        if bucket:
+            peaks[i] = min(127, max(max(bucket), -min(bucket)) >> 8)
+    return bytes(peaks)
+
+
+def write_peaks(path: str) -> bool:
+    peaks = compute_peaks(path)
+    if peaks is None:
+        return False
+
+    temp = f"{peaks_path(path)}.tmp"
+    with open(temp, "wb") as f:
+        f.write(peaks)
+    os.replace(temp, peaks_path(path))
+    return True
+
+
+def get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # The bot is threaded, which fork doesn't mix well with.
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=conf.mvc.analysis_workers,
+            mp_context=multiprocessing.get_context("forkserver")
+        )
+    return _pool
+
+
+async def analyze_song(song) -> dict[str, t.Any]:
+    from .models import Song
+
+    loop = asyncio.get_running_loop()
+    results = await loop.run_in_executor(get_pool(), analyze, song.file.path)
+    await loop.run_in_executor(get_pool(), write_peaks, song.file.path)
+    # update() keeps this from rewriting tags, so the cache is told directly.
+    await Song.objects.filter(pk=song.pk).aupdate(**results)
+    Song.objects.evict(song.pk)
+    return results
+
+
+def schedule_analysis(song) -> None:
+    async def run():
+        try:
+            await analyze_song(song)
+        except Exception as e:
+            logger.warning(f"Failed to analyze song {song.pk}: {e}")
+
+    task = asyncio.get_running_loop().create_task(run())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,53 @@
+import concurrent.futures
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand
+
+from ...analysis import analyze
+from ...models import Song
+
+
+FIELDS = ["duration", "bitrate", "sample_rate", "codec", "loudness"]
+
+
+class Command(BaseCommand):
+    help = "Measure the duration, bitrate, codec and loudness of songs which haven't been analyzed yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--all", action="store_true", help="Reanalyze every song, not just those missing data.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        songs = Song.objects.all() if options["all"] else Song.objects.filter(duration__isnull=True)
+        songs = [song for song in songs if song.file and os.path.isfile(song.file.path)]
+
+        updated = []
+        failed = 0
+        context = multiprocessing.get_context("forkserver")
+        # Only analyze() is sent to the workers, since this module needs Django.
+        with concurrent.futures.ProcessPoolExecutor(max_workers=options["workers"], mp_context=context) as pool:
+            futures = {pool.submit(analyze, song.file.path): song for song in songs}
+            for future in concurrent.futures.as_completed(futures):
+                song = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Failed to analyze song {song.pk} ({song.name}): {e}")
+                    continue
+
+                for field, value in results.items():
+                    setattr(song, field, value)
+                updated.append(song)
+
+                if len(updated) >= options["batch_size"]:
+                    Song.objects.bulk_update(updated, FIELDS)
+                    updated.clear()
+
+        # bulk_update() sends no signals, so no tags are rewritten and the
+        # cache is simply dropped.
+        Song.objects.bulk_update(updated, FIELDS)
+        Song.objects.clear_cache()
+        self.stdout.write(f"Analyzed {len(songs) - failed} songs. {failed} failed.")
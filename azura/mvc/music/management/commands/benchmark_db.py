@@ -0,0 +1,114 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ....core.conf import Config
+from ....lib.metrics import Histogram
+
+
+conf = Config.load()
+
+
+# What SQLite does when nothing is configured.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+}
+
+
+def connect(path, pragmas):
+    db = sqlite3.connect(path, timeout=pragmas.get("busy_timeout", 5000) / 1000, check_same_thread=False)
+    for key, value in pragmas.items():
+        db.execute(f"PRAGMA {key}={value}")
+    return db
+
+
+def populate(path, pragmas, rows):
+    db = connect(path, pragmas)
+    db.execute("CREATE TABLE song (id INTEGER PRIMARY KEY, name VARCHAR(256), library INTEGER)")
+    db.execute("CREATE INDEX song_name ON song (name)")
+    db.executemany(
+        "INSERT INTO song (id, name, library) VALUES (?, ?, ?)",
+        [(i, f"song {i}", 0) for i in range(rows)]
+    )
+    db.commit()
+    db.close()
+
+
+def run(path, pragmas, readers, seconds, rows):
+    stop = threading.Event()
+    reads, writes = Histogram(1 << 16), Histogram(1 << 16)
+    errors = []
+
+    def reader():
+        db = connect(path, pragmas)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.execute("SELECT id, name FROM song WHERE name = ?", (f"song {random.randrange(rows)}",)).fetchall()
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+                continue
+            reads.observe(time.perf_counter() - start)
+        db.close()
+
+    def writer():
+        db = connect(path, pragmas)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                db.execute("UPDATE song SET library = ? WHERE id = ?", (random.randrange(8), random.randrange(rows)))
+                db.commit()
+            except sqlite3.OperationalError as e:
+                db.rollback()
+                errors.append(e)
+                continue
+            writes.observe(time.perf_counter() - start)
+        db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return reads, writes, len(errors)
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent reads and writes under SQLite's defaults and under the configured profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=conf.mvc.database.read_workers)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--rows", type=int, default=20000)
+        # fsync costs are the whole point, so by default this runs on the
+        # same filesystem as the real database.
+        parser.add_argument("--dir", default=os.path.dirname(os.path.abspath(conf.mvc.database.path)))
+
+    def handle(self, *args, **options):
+        profiles = (("default", DEFAULT_PRAGMAS), ("configured", settings.SQLITE_PRAGMAS))
+
+        for name, pragmas in profiles:
+            with tempfile.TemporaryDirectory(dir=options["dir"]) as tmp:
+                path = os.path.join(tmp, "benchmark.sqlite3")
+                populate(path, pragmas, options["rows"])
+                reads, writes, errors = run(path, pragmas, options["readers"], options["seconds"], options["rows"])
+
+            read50, read95 = reads.percentiles(50, 95)
+            write50, write95 = writes.percentiles(50, 95)
+            self.stdout.write(
+                f"{name:>10}: "
+                f"{reads.count / options['seconds']:.0f} reads/s (p50 {read50 * 1000:.2f} ms, p95 {read95 * 1000:.2f} ms), "
+                f"{writes.count / options['seconds']:.0f} writes/s (p50 {write50 * 1000:.2f} ms, p95 {write95 * 1000:.2f} ms), "
+                f"{errors} lock errors"
+            )
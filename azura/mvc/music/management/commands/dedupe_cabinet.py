@@ -0,0 +1,99 @@
+import collections
+import concurrent.futures
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Playlist, Song
+from ...models.library import compute_sha256
+
+
+def hash_song(song: Song) -> tuple[int, str | None]:
+    if not song.file or not os.path.isfile(song.file.path):
+        return song.pk, None
+    with open(song.file.path, "rb") as f:
+        return song.pk, compute_sha256(f)
+
+
+def merge(keeper: Song, duplicates: list[Song]) -> None:
+    through = Playlist.songs.through
+    song_field = next(f.name for f in through._meta.fields if f.related_model is Song)
+    playlist_field = next(f.name for f in through._meta.fields if f.related_model is Playlist)
+
+    for duplicate in duplicates:
+        keeper.artists.add(*duplicate.artists.all())
+
+        for entry in through.objects.filter(**{song_field: duplicate}):
+            playlist = getattr(entry, playlist_field)
+            if through.objects.filter(**{playlist_field: playlist, song_field: keeper}).exists():
+                entry.delete()
+            else:
+                setattr(entry, song_field, keeper)
+                entry.save()
+
+        if duplicate.file.name == keeper.file.name:
+            # Deleting the song would otherwise take the shared file with it.
+            duplicate.file = ""
+        duplicate.delete()
+
+
+class Command(BaseCommand):
+    help = "Hash every song in the cabinet, reporting or merging duplicates and recording hashes for songs which have none."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--merge",
+            action="store_true",
+            help="Merge duplicates into the oldest copy, moving their artists and playlist entries over."
+        )
+
+    def handle(self, *args, **options):
+        songs = {song.pk: song for song in Song.objects.select_related("library")}
+        groups = collections.defaultdict(list)
+        missing = []
+
+        # hashlib drops the GIL while hashing, so threads are enough here.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            for pk, digest in pool.map(hash_song, songs.values()):
+                if digest is None:
+                    missing.append(songs[pk])
+                else:
+                    groups[digest].append(songs[pk])
+
+        for song in missing:
+            self.stderr.write(f"Missing file for song {song.pk} ({song.name}): {song.file.name}")
+
+        duplicates = 0
+        for digest, group in groups.items():
+            group.sort(key=lambda song: song.pk)
+            keeper, extras = group[0], group[1:]
+
+            if extras:
+                duplicates += len(extras)
+                names = ", ".join(f"{song.pk} ({song.name})" for song in extras)
+                self.stdout.write(f"{digest[:12]}: {keeper.pk} ({keeper.name}) duplicated by {names}")
+                if not options["merge"]:
+                    continue
+
+            with transaction.atomic():
+                if extras:
+                    merge(keeper, extras)
+                self.record_hash(keeper, extras if options["merge"] else [], digest)
+
+        verb = "Merged" if options["merge"] else "Found"
+        self.stdout.write(f"Hashed {len(songs) - len(missing)} songs. {verb} {duplicates} duplicates.")
+
+    def record_hash(self, keeper: Song, merged: list[Song], digest: str) -> None:
+        # Song.sha256 is the hash of the file as uploaded, and tags are
+        # rewritten after upload, so a stored hash is never replaced with
+        # one of the file as it is now.
+        if keeper.sha256:
+            return
+
+        # A merged duplicate's upload hash still catches re-uploads of the
+        # original. Failing that, the file as stored is the best there is.
+        sha256 = next((song.sha256 for song in merged if song.sha256), digest)
+        if not Song.objects.filter(sha256=sha256).exclude(pk=keeper.pk).exists():
+            Song.objects.filter(pk=keeper.pk).update(sha256=sha256)
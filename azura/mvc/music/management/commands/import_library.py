@@ -0,0 +1,121 @@
+import concurrent.futures
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...analysis import read_track
+from ...models import Artist, Library, Song
+from .....core.conf import Config
+
+
+conf = Config.load()
+
+EXTENSIONS = {"mp3", "flac", "ogg", "opus", "m4a", "wav"}
+
+
+def walk(root: str) -> list[str]:
+    paths = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.rsplit(".", 1)[-1].lower() in EXTENSIONS:
+                paths.append(os.path.join(directory, name))
+    return sorted(paths)
+
+
+class Command(BaseCommand):
+    help = "Import every audio file under a directory into a library, skipping files which are already imported."
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory")
+        parser.add_argument("--library", required=True, help="The library to import into, created if it doesn't exist.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--default-artist", default="Unknown Artist", help="Artist given to files with no artist tag.")
+        parser.add_argument("--loudness", action="store_true", help="Also measure loudness, which requires ffmpeg and is slow.")
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options["directory"]):
+            raise CommandError(f"{options['directory']} is not a directory.")
+
+        library, _ = Library.objects.get_or_create(name=options["library"])
+        cabinet = os.path.join(conf.mvc.upload_root, "cabinet", str(library.id))
+        paths = walk(options["directory"])
+        self.stdout.write(f"Found {len(paths)} audio files.")
+
+        self.imported = 0
+        self.skipped = 0
+        failed = 0
+        batch = []
+        context = multiprocessing.get_context("forkserver")
+
+        # Files are copied into the cabinet before their songs are written,
+        # and songs are keyed by hash, so an interrupted import can simply
+        # be run again.
+        with concurrent.futures.ProcessPoolExecutor(max_workers=options["workers"], mp_context=context) as pool:
+            futures = {
+                pool.submit(read_track, path, cabinet, options["loudness"]): path
+                for path in paths
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    batch.append(future.result())
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Failed to read {futures[future]}: {e}")
+                    continue
+
+                if len(batch) >= options["batch_size"]:
+                    self.write_batch(library, batch, options["default_artist"])
+                    batch.clear()
+
+        self.write_batch(library, batch, options["default_artist"])
+        Song.objects.clear_cache()
+        Artist.objects.clear_cache()
+        self.stdout.write(f"Imported {self.imported} songs. Skipped {self.skipped} already imported. {failed} failed.")
+
+    def write_batch(self, library: Library, tracks: list[dict], default_artist: str) -> None:
+        tracks = list({track['sha256']: track for track in tracks}.values())
+        existing = set(
+            Song.objects.filter(sha256__in=[track['sha256'] for track in tracks]).values_list("sha256", flat=True)
+        )
+        tracks = [track for track in tracks if track['sha256'] not in existing]
+        self.skipped += len(existing)
+        if not tracks:
+            return
+
+        for track in tracks:
+            track['artists'] = [name[:256] for name in track['artists']] or [default_artist]
+        names = {name for track in tracks for name in track['artists']}
+
+        with transaction.atomic():
+            # bulk_create() sends no signals, so none of these files have
+            # their tags rewritten.
+            Artist.objects.bulk_create([Artist(name=name) for name in names], ignore_conflicts=True)
+            artists = dict(Artist.objects.filter(name__in=names).values_list("name", "pk"))
+
+            songs = Song.objects.bulk_create([
+                Song(
+                    name=track['name'][:256],
+                    file=f"cabinet/{library.id}/{track['sha256']}.{track['ext']}",
+                    library=library,
+                    sha256=track['sha256'],
+                    duration=track['duration'],
+                    bitrate=track['bitrate'],
+                    sample_rate=track['sample_rate'],
+                    codec=track['codec'],
+                    loudness=track['loudness'],
+                )
+                for track in tracks
+            ])
+
+            through = Song.artists.through
+            through.objects.bulk_create([
+                through(song_id=song.pk, artist_id=artists[name])
+                for song, track in zip(songs, tracks)
+                for name in dict.fromkeys(track['artists'])
+            ])
+
+        self.imported += len(songs)
+        self.stdout.write(f"Imported {self.imported} songs so far.")
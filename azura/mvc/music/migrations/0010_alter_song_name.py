@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0009_stream'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='song',
+            name='name',
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+    ]
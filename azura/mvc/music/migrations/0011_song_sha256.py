@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0010_alter_song_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
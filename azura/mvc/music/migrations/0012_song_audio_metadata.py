@@ -0,0 +1,38 @@
+# Generated by Django 6.0.4 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0011_song_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='song',
+            name='duration',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Length in milliseconds.', null=True),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Sample rate in Hz.', null=True),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Bitrate in bits per second.', null=True),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='codec',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='loudness',
+            field=models.FloatField(blank=True, editable=False, help_text='Integrated loudness in LUFS.', null=True),
+        ),
+    ]
@@ -1,22 +1,45 @@
 from __future__ import annotations
 
+import datetime
+import hashlib
 import os
+import typing as t
 from uuid import uuid4
 
-import music_tag
-from django.core.exceptions import SynchronousOnlyOperation
-from django.db import models
+from django.core.exceptions import SynchronousOnlyOperation, ValidationError
+from django.core.files import File
+from django.db import models, transaction
 from django.dispatch import receiver
 from jarowinkler import jarowinkler_similarity as jw_similarity
 
-from ...core.models import BaseAsyncModel
+from ...core.models import BaseAsyncModel, CachingAsyncManager
+from ..tagging import tag_writer
+from ....core.conf import Config
+from ....lib.sessions import preloader
+from ....lib.utils import strfdelta
+
+
+conf = Config.load()
 
 
 def get_upload_path(instance: Song, filename: str) -> str:
     ext = filename.split(".")[-1]
+    if instance.sha256:
+        return f"cabinet/{instance.library.id}/{instance.sha256}.{ext}"
     return f"cabinet/{instance.library.id}/{instance.name} [{uuid4().hex}].{ext}"
 
 
+def compute_sha256(f: t.IO[bytes] | File) -> str:
+    digest = hashlib.sha256()
+    if isinstance(f, File):
+        for chunk in f.chunks():
+            digest.update(chunk)
+    else:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class Library(BaseAsyncModel):
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(unique=True, max_length=256)
@@ -29,16 +52,44 @@ class Artist(BaseAsyncModel):
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(unique=True, max_length=256)
 
+    objects = CachingAsyncManager(cache_capacity=conf.mvc.cache.artists)
+
     def __str__(self) -> str:
         return self.name
 
 
+class SongManager(CachingAsyncManager):
+    def get_cached_queryset(self):
+        # Songs are almost never shown without their artists, so they are
+        # cached together.
+        return self.get_queryset().prefetch_related("artists")
+
+    async def aget_cached_by_file(self, filename: str) -> Song:
+        return await self.aget_cached_by(file__contains=filename)
+
+
 class Song(BaseAsyncModel):
     id = models.BigAutoField(primary_key=True)
-    name = models.CharField(max_length=256)
+    name = models.CharField(max_length=256, db_index=True)
     file = models.FileField(upload_to=get_upload_path)
     library = models.ForeignKey("Library", on_delete=models.CASCADE)
     artists = models.ManyToManyField("Artist")
+    sha256 = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    duration = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Length in milliseconds.")
+    sample_rate = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Sample rate in Hz.")
+    bitrate = models.PositiveIntegerField(null=True, blank=True, editable=False, help_text="Bitrate in bits per second.")
+    codec = models.CharField(max_length=32, blank=True, default="", editable=False)
+    loudness = models.FloatField(null=True, blank=True, editable=False, help_text="Integrated loudness in LUFS.")
+
+    objects = SongManager(cache_capacity=conf.mvc.cache.songs)
+
+    def clean(self) -> None:
+        # Hashing new files here means a duplicate is rejected by the form
+        # instead of being stored again.
+        if self.file and not self.file._committed:
+            self.sha256 = compute_sha256(self.file)
+            if Song.objects.filter(sha256=self.sha256).exclude(pk=self.pk).exists():
+                raise ValidationError({'file': "This file is already in the cabinet."})
 
     def __str__(self) -> str:
         try:
@@ -53,6 +104,19 @@ class Song(BaseAsyncModel):
     def title(self) -> str:
         return str(self)
 
+    @property
+    def length(self) -> str:
+        if self.duration is None:
+            return " - "
+        return strfdelta(datetime.timedelta(milliseconds=self.duration), '{%M}:{%S}')
+
+    @property
+    def gain(self) -> float | None:
+        """The gain in dB which brings this song to the target loudness."""
+        if self.loudness is None:
+            return None
+        return conf.lavalink.target_loudness - self.loudness
+
     def compute_similarity(self, name: str) -> float:
         return jw_similarity(self.name, name)
 
@@ -67,21 +131,54 @@ class Song(BaseAsyncModel):
 
 @receiver(models.signals.post_delete, sender=Song)
 def auto_remove_deleted_song(sender, instance, **kwargs):
+    Song.objects.evict(instance.pk)
+
     if instance.file:
+        preloader.forget(instance.file.path)
         if os.path.isfile(instance.file.path):
             os.remove(instance.file.path)
+        if os.path.isfile(f"{instance.file.path}.peaks"):
+            os.remove(f"{instance.file.path}.peaks")
 
 
 @receiver(models.signals.post_save, sender=Song)
 def auto_id3_update(sender, instance, **kwargs):
-    if instance.file.path.endswith(".mp3"):
-        f = music_tag.load_file(instance.file.path)
-        f["title"] = instance.name
-        f["artist"] = []
-
-        for artist in instance.artists.all():
-            f["artist"].append(artist.name)
-        f.save()
+    Song.objects.evict(instance.pk)
+    # Waiting for the commit means the writer never reads a song which
+    # isn't there yet, or which is about to be rolled back.
+    pk = instance.pk
+    transaction.on_commit(lambda: tag_writer.schedule(pk))
+
+
+@receiver(models.signals.m2m_changed, sender=Song.artists.through)
+def evict_song_on_artists_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if isinstance(instance, Song):
+        Song.objects.evict(instance.pk)
+    else:
+        Song.objects.clear_cache()
+
+    if not action.startswith("post_"):
+        return
+
+    # Artists are usually added after the song is first saved, so its tags
+    # need writing again.
+    if not reverse:
+        song_ids = [instance.pk]
+    elif pk_set is not None:
+        song_ids = list(pk_set)
+    else:
+        song_ids = []
+
+    for pk in song_ids:
+        transaction.on_commit(lambda pk=pk: tag_writer.schedule(pk))
+
+
+@receiver(models.signals.post_save, sender=Artist)
+@receiver(models.signals.post_delete, sender=Artist)
+def evict_artist(sender, instance, **kwargs):
+    Artist.objects.evict(instance.pk)
+    # Cached songs carry their artists with them.
+    Song.objects.clear_cache()
 
 
 class Stream(BaseAsyncModel):
@@ -1,12 +1,36 @@
 from __future__ import annotations
 from django.db import models
+from django.dispatch import receiver
 from sortedm2m.fields import SortedManyToManyField
 
 
-from ...core.models import BaseAsyncModel
+from ...core import executor
+from ...core.models import BaseAsyncModel, CachingAsyncManager
+from ....core.conf import Config
 from .library import Song
 
 
+conf = Config.load()
+
+
+class PlaylistManager(CachingAsyncManager):
+    async def aget_songs_cached(self, playlist: Playlist) -> list[Song]:
+        """
+        Get the songs of a playlist in order, along with their artists.
+
+        The order is cached alongside the playlist, and the songs themselves
+        come from Song's cache, so only the songs which aren't already
+        cached are read.
+        """
+        song_ids = getattr(playlist, "_song_ids", None)
+        if song_ids is None:
+            song_ids = await executor.read(lambda: list(playlist.songs.values_list("pk", flat=True)))
+            playlist._song_ids = song_ids
+
+        songs = await Song.objects.ain_bulk_cached(song_ids)
+        return [songs[pk] for pk in song_ids if pk in songs]
+
+
 class Playlist(BaseAsyncModel):
     id = models.BigAutoField(primary_key=True)
     owner = models.ForeignKey("discord.User", on_delete=models.CASCADE)
@@ -14,9 +38,31 @@ class Playlist(BaseAsyncModel):
     description = models.TextField(default="No description provided.")
     songs = SortedManyToManyField(Song, blank=True)
     is_global = models.BooleanField(default=False)
+
+    objects = PlaylistManager(cache_capacity=conf.mvc.cache.playlists)
     
     class Meta: # type: ignore
         unique_together = ('owner', 'name',)
     
     def __str__(self) -> str:
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+@receiver(models.signals.post_save, sender=Playlist)
+@receiver(models.signals.post_delete, sender=Playlist)
+def evict_playlist(sender, instance, **kwargs):
+    Playlist.objects.evict(instance.pk)
+
+
+@receiver(models.signals.m2m_changed, sender=Playlist.songs.through)
+def evict_playlist_on_songs_change(sender, instance, **kwargs):
+    if isinstance(instance, Playlist):
+        Playlist.objects.evict(instance.pk)
+    else:
+        Playlist.objects.clear_cache()
+
+
+@receiver(models.signals.post_delete, sender=Song)
+def evict_playlists_on_song_delete(sender, instance, **kwargs):
+    # Deleting a song removes it from playlists without m2m_changed firing.
+    Playlist.objects.clear_cache()
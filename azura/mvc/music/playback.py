@@ -0,0 +1,166 @@
+"""Module defining loudness-normalized playback
+
+Songs are measured once, in the background, and their loudness stored on
+the Song. Normalizing them is then a matter of scaling the player's
+volume by each song's gain. The volume users set is kept apart from the
+one Lavalink is given, so users always see and change their own, and
+the gain is folded in on the way to Lavalink. Only set_volume() is used
+for this, since it's the one volume call azura knows koe to have.
+
+The volume belongs to the player rather than to tracks, so the gain of
+whatever plays next is switched in just before the current track ends,
+rather than once the next track has already started at the old gain.
+
+    * gain_factor - Function turning a gain in dB into a volume multiplier
+    * effective_volume - Function giving the volume Lavalink plays a session at
+    * set_volume - Coroutine setting the volume users hear, before normalization
+    * incr_volume - Coroutine changing the volume users hear by some amount
+    * apply_gain - Coroutine normalizing a session's current track and timing the next
+    * enqueue_song - Coroutine loading and enqueueing a song, normalizing it if it starts
+"""
+import asyncio
+
+import koe
+
+from .models import Song
+from ...core.conf import Config
+from ...core.log import logging
+from ...lib.sessions import player_states, preloader, user_volume
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("playback")
+
+# Lavalink plays volumes of up to 1000%, and a boost is capped well short.
+MAX_FACTOR = 5.0
+MAX_VOLUME = 1000
+DEFAULT_VOLUME = 100
+# How long before a track ends the next one's gain is switched in.
+TRANSITION_LEAD = 0.25
+# How long after that the track must have changed by, or the switch is undone.
+TRANSITION_GRACE = 2.0
+
+_transitions: dict[int, asyncio.Task] = {}
+
+
+def gain_factor(gain: float | None) -> float:
+    if gain is None or not conf.lavalink.normalize:
+        return 1.0
+    return min(10 ** (gain / 20), MAX_FACTOR)
+
+
+async def track_factor(track: koe.Track) -> float:
+    fname = track.info.identifier.split("/")[-1]
+    try:
+        song = await Song.objects.aget_cached_by_file(fname)
+    except Song.DoesNotExist:
+        # Streams and the like have no stored loudness.
+        return 1.0
+    return gain_factor(song.gain)
+
+
+def effective_volume(session: koe.Session) -> int:
+    volume = user_volume(session)
+    volume = volume if volume is not None else DEFAULT_VOLUME
+    return max(0, min(round(volume * getattr(session, "_gain_factor", 1.0)), MAX_VOLUME))
+
+
+def _pin_user_volume(session: koe.Session) -> None:
+    # Until a gain is applied, the session's own volume is the users'.
+    if getattr(session, "_user_volume", None) is None:
+        session._user_volume = session._volume if session._volume is not None else DEFAULT_VOLUME
+
+
+async def set_volume(session: koe.Session, level: int, user_id: int) -> None:
+    session._user_volume = max(0, level)
+    await session.set_volume(effective_volume(session), user_id=user_id)
+
+
+async def incr_volume(session: koe.Session, change: int, user_id: int) -> None:
+    _pin_user_volume(session)
+    await set_volume(session, session._user_volume + change, user_id)
+
+
+async def set_gain(session: koe.Session, factor: float) -> None:
+    if getattr(session, "_gain_factor", 1.0) == factor:
+        return
+
+    _pin_user_volume(session)
+    previous, session._gain_factor = getattr(session, "_gain_factor", 1.0), factor
+    try:
+        await session.set_volume(effective_volume(session), user_id=session.bot.get_me().id)
+    except koe.errors.KoeError as e:
+        session._gain_factor = previous
+        logger.warning(f"Failed to apply gain in {session.guild_id}: {e}")
+
+
+async def next_track(session: koe.Session) -> koe.Track | None:
+    if session._repeat_mode is koe.RepeatMode.ONE:
+        return session._current_track
+
+    tracks, index = await session.queue.get_all_and_pos()
+    if index + 1 < len(tracks):
+        return tracks[index + 1]
+    if session._repeat_mode is koe.RepeatMode.ALL and tracks:
+        return tracks[0]
+    return None
+
+
+async def _transition(session: koe.Session) -> None:
+    track = session._current_track
+    if track is None or not track.info.length:
+        return
+
+    while session._current_track is track:
+        state = player_states.get_for(session)
+        position = state.position if state is not None else session._current_track_pos or 0
+        remaining = (track.info.length - position) / 1000
+        # Rechecked every few seconds, since pauses and seeks move the end.
+        if session._paused or remaining > TRANSITION_LEAD:
+            await asyncio.sleep(1.0 if session._paused else min(remaining - TRANSITION_LEAD, 5.0))
+            continue
+
+        upcoming = await next_track(session)
+        if upcoming is None or upcoming is track:
+            return
+        await set_gain(session, await track_factor(upcoming))
+
+        await asyncio.sleep(TRANSITION_LEAD + TRANSITION_GRACE)
+        if session._current_track is track:
+            # The track didn't end when expected, so it keeps its own gain.
+            await set_gain(session, await track_factor(track))
+        return
+
+
+def schedule_transition(session: koe.Session) -> None:
+    guild_id = int(session.guild_id)
+    task = _transitions.pop(guild_id, None)
+    if task is not None:
+        task.cancel()
+
+    task = _transitions[guild_id] = asyncio.get_running_loop().create_task(_transition(session))
+
+    def done(task: asyncio.Task) -> None:
+        if _transitions.get(guild_id) is task:
+            del _transitions[guild_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Failed to time the next gain in {guild_id}: {task.exception()}")
+    task.add_done_callback(done)
+
+
+async def apply_gain(session: koe.Session) -> None:
+    track = session._current_track
+    if track is None:
+        return
+    # The track may have changed, so whatever follows it needs warming too.
+    preloader.schedule(session.guild_id)
+
+    await set_gain(session, await track_factor(track))
+    schedule_transition(session)
+
+
+async def enqueue_song(session: koe.Session, song: Song, user_id: int) -> koe.Track:
+    track = await preloader.load(session.koe, song.file.path)
+    await session.enqueue(track, user_id=user_id)
+    await apply_gain(session)
+    return track
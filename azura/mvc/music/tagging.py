@@ -0,0 +1,186 @@
+"""Module defining the background tag writer
+
+Rewriting a file's tags means loading and saving the whole file, which is
+far too slow to do inside Song.save(). Instead, saves schedule the song
+here once their transaction commits, and a small pool of threads does the
+writing. A song saved again while it is still waiting is only written
+once, and one saved while it is being written is written again afterwards
+so the newest data always wins. Outstanding and failed songs are kept in
+a file under azura's root, so a restart or a locked file doesn't lose
+them.
+
+Management commands save songs from processes of their own, so every
+process keeps its own file, named for its PID. Before writing to it for
+the first time, a writer adopts whatever was left in the files of
+processes which are no longer running.
+
+    * TagWriter - Bounded pool writing tags, coalescing repeats and persisting failures
+    * write_tags - Function writing a song's title and artists into its file
+    * tag_writer - The writer used by Song's receivers
+"""
+import concurrent.futures
+import fcntl
+import os
+import threading
+
+import music_tag
+import orjson as json
+from django import db
+
+from ...core.conf import Config
+from ...core.log import logging
+from ....lib.sessions import preloader
+
+
+conf = Config.load()
+logger = logging.getLogger(conf.name).getChild("tagging")
+
+TAGGABLE_EXTENSIONS = {"mp3", "flac", "ogg", "opus", "m4a"}
+MAX_ATTEMPTS = 5
+
+
+def write_tags(pk: int) -> None:
+    from .models import Song
+
+    try:
+        song = Song.objects.prefetch_related("artists").get(pk=pk)
+    except Song.DoesNotExist:
+        return
+
+    if song.file.path.rsplit(".", 1)[-1].lower() not in TAGGABLE_EXTENSIONS:
+        return
+
+    f = music_tag.load_file(song.file.path)
+    f["title"] = song.name
+    f["artist"] = []
+
+    for artist in song.artists.all():
+        f["artist"].append(artist.name)
+    f.save()
+    # Lavalink read the old tags when the track was loaded.
+    preloader.forget(song.file.path)
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class TagWriter:
+    def __init__(self, workers: int, queue_dir: str):
+        self.queue_dir = queue_dir
+        self.queue_path = os.path.join(queue_dir, f"{os.getpid()}.json")
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="azura-tags"
+        )
+        self._lock = threading.Lock()
+        self._queued: set[int] = set()
+        self._running: set[int] = set()
+        self._rerun: set[int] = set()
+        self._failed: dict[int, int] = {}
+        self._restored = False
+
+    def schedule(self, pk: int) -> None:
+        self._restore()
+        with self._lock:
+            if pk in self._queued:
+                return
+            if pk in self._running:
+                self._rerun.add(pk)
+                return
+            self._queued.add(pk)
+            self._persist()
+        self._executor.submit(self._run, pk)
+
+    def retry(self) -> None:
+        """Reschedule everything outstanding, restoring the saved queues the first time."""
+        self._restore()
+        with self._lock:
+            pending = set(self._failed.keys())
+        for pk in pending:
+            self.schedule(pk)
+
+    def _run(self, pk: int) -> None:
+        with self._lock:
+            self._queued.discard(pk)
+            self._running.add(pk)
+
+        try:
+            write_tags(pk)
+        except Exception as e:
+            with self._lock:
+                attempts = self._failed.get(pk, 0) + 1
+                if attempts >= MAX_ATTEMPTS:
+                    self._failed.pop(pk, None)
+                    logger.error(f"Giving up on writing tags for song {pk} after {attempts} attempts: {e}")
+                else:
+                    self._failed[pk] = attempts
+                    logger.warning(f"Failed to write tags for song {pk}, will retry: {e}")
+        else:
+            with self._lock:
+                self._failed.pop(pk, None)
+        finally:
+            db.close_old_connections()
+            with self._lock:
+                self._running.discard(pk)
+                rerun = pk in self._rerun
+                self._rerun.discard(pk)
+                self._persist()
+
+        if rerun:
+            self.schedule(pk)
+
+    def _persist(self) -> None:
+        state = {
+            'pending': sorted(self._queued | self._running | self._rerun),
+            'failed': {str(pk): attempts for pk, attempts in self._failed.items()},
+        }
+        # A process with nothing outstanding leaves nothing behind.
+        if not state['pending'] and not state['failed']:
+            if os.path.exists(self.queue_path):
+                os.remove(self.queue_path)
+            return
+
+        temp = f"{self.queue_path}.tmp"
+        with open(temp, "wb") as f:
+            f.write(json.dumps(state))
+        os.replace(temp, self.queue_path)
+
+    def _restore(self) -> None:
+        with self._lock:
+            if self._restored:
+                return
+            self._restored = True
+            os.makedirs(self.queue_dir, exist_ok=True)
+
+            # The lock keeps two writers starting together from both adopting
+            # the same file.
+            with open(os.path.join(self.queue_dir, ".lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                for name in os.listdir(self.queue_dir):
+                    pid, _, ext = name.partition(".")
+                    if ext != "json" or not pid.isdigit():
+                        continue
+                    if int(pid) != os.getpid() and pid_alive(int(pid)):
+                        continue
+
+                    path = os.path.join(self.queue_dir, name)
+                    with open(path, "rb") as f:
+                        state = json.loads(f.read())
+                    for pk, attempts in state.get('failed', {}).items():
+                        self._failed[int(pk)] = max(attempts, self._failed.get(int(pk), 0))
+                    # Anything which was pending when its process stopped is
+                    # treated as a failure which hasn't been attempted yet.
+                    for pk in state.get('pending', []):
+                        self._failed.setdefault(pk, 0)
+                    os.remove(path)
+                self._persist()
+
+
+tag_writer = TagWriter(conf.mvc.tag_workers, os.path.join(conf.root, "tag_queue"))
@@ -1,7 +1,9 @@
 from django.urls import path
 
-from .views import get_player, get_player_templ, update_player, upload_file, get_songs
+from .views import get_player, get_player_templ, update_player, get_songs
 from .views import playlists, get_playlist, save_playlist, delete_playlist
+from .views.uploads import upload_file, upload_status, upload_chunk, upload_finish
+from .views.waveform import get_peaks, get_waveform
 
 
 urlpatterns = [
@@ -9,7 +11,12 @@ urlpatterns = [
     path("player-get", get_player_templ),
     path("player-update", update_player),
     path("get-songs", get_songs),
+    path("peaks/<int:song_id>", get_peaks),
+    path("waveform/<int:song_id>.svg", get_waveform),
     path("upload", upload_file),
+    path("upload-status", upload_status),
+    path("upload-chunk", upload_chunk),
+    path("upload-finish", upload_finish),
     path("playlists", playlists),
     path("get-playlist", get_playlist),
     path("save-playlist", save_playlist),
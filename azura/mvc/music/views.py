@@ -9,6 +9,7 @@ import typing
 
 from ..core.utils import template
 from ..core.oauth2 import require_auth
+from ...lib.sessions import voice_index
 from ...lib.utils import strfdelta
 from ..music.models import Song, Artist, Library, Playlist
 from ..discord.models import User
@@ -16,22 +17,21 @@ from ..discord.middleware import DiscordAwareHttpRequest as HttpRequest
 
 
 def get_voice_state_for_user(bot, user):
-    for guild, user_state in bot.cache.get_voice_states_view().items():
-        for u, state in user_state.items():
-            if u == user:
-                return guild, state
-    return None, None
+    location = voice_index.get(user)
+    if location is None:
+        return None, None
+    return location
 
 
 async def get_session_or_none_from_uid(bot, user) -> koe.Session | None:
-    guild, state = get_voice_state_for_user(bot, user)
+    guild, channel = get_voice_state_for_user(bot, user)
     
     if guild is None:
         return None
-    if state is None:
+    if channel is None:
         return None
     
-    return await bot.koe.get_session_or_none_by(guild_id=guild)
+    return await bot.nodes.get_session_or_none_by(guild)
 
 
 class TrackProxy:
@@ -348,7 +348,7 @@ async def update_player(request: HttpRequest):
         await session.skip(by=-1, user_id=uid)
     if action == "search":
         songs = await Song.search(request.POST["song"])
-        track = await request.bot.koe.load_tracks(songs[0][1].file.path)
+        track = await session.koe.load_tracks(songs[0][1].file.path)
         assert isinstance(track, koe.Track)
         await session.enqueue(track, user_id=uid)
         return HttpResponse("")
@@ -358,7 +358,7 @@ async def update_player(request: HttpRequest):
     if action == "enqueue":
         song_id = int(request.POST["song"])
         song = await Song.objects.aget(id=song_id)
-        track = await request.bot.koe.load_tracks(song.file.path)
+        track = await session.koe.load_tracks(song.file.path)
         await session.enqueue(track, user_id=uid)
     if action == "seek":
         if session._current_track is None:
@@ -1,18 +1,22 @@
-from asgiref.sync import sync_to_async
 from django.http import HttpResponse, JsonResponse
 from django.db.utils import IntegrityError
+import collections
+import datetime
 import koe
 import orjson as json
 import types
-import typing
 
+from ...core import executor
 from ...core.utils import template
 from ...core.oauth2 import require_auth
-from ...music.models import Song, Artist, Library, Playlist
+from ...music.models import Song, Playlist
+from ...music.playback import apply_gain, enqueue_song, set_volume
 from ...discord.models import User
 from ...discord.middleware import DiscordAwareHttpRequest as HttpRequest
 from .proxies import SessionProxy, SongProxy
-from .utils import get_session_or_none_from_uid
+from .utils import get_session_or_none_from_request
+from ....lib.sessions import Action, activity, histories, player_states, session_actions, session_manager
+from ....lib.utils import strfdelta
 
 
 @require_auth
@@ -24,9 +28,7 @@ async def get_player(request):
 @require_auth
 @template("player_templ.html")
 async def get_player_templ(request):
-    uid = request.session.get("uid")
-    
-    session = await get_session_or_none_from_uid(request.bot, uid)
+    session = await get_session_or_none_from_request(request)
     session = SessionProxy(session)
     await session.fetch()
         
@@ -35,49 +37,6 @@ async def get_player_templ(request):
     }
 
 
-@require_auth
-@template("upload.html")
-async def upload_file(request: HttpRequest) -> dict[str, typing.Any]:
-    artists = []
-    async for artist in Artist.objects.all():
-        artists.append(artist)
-    
-    if request.method == 'POST':
-        for fname, file in request.FILES.items():
-            song_data = request.POST[fname]
-            song_data = json.loads(song_data)
-            
-            try:
-                song = await Song.objects.aget(name=song_data['name'])
-                
-                artists = []
-                for artist in song_data['artists']:
-                    try:
-                        artist = await Artist.objects.aget(name=artist)
-                        contains = await song.artists.acontains(artist)
-                        if not contains:
-                            raise Song.DoesNotExist
-                    except Artist.DoesNotExist:
-                        raise Song.DoesNotExist
-                
-            except Song.DoesNotExist:
-                lib = await Library.objects.aget(name="Society of Spilled Milk")
-                song = Song(name=song_data['name'], library=lib)
-                await sync_to_async(song.file.save)(file.name, file)
-                await song.asave()
-                
-                for artist in song_data['artists']:
-                    try:
-                        artist = await Artist.objects.aget(name=artist)
-                        await song.artists.aadd(artist)
-                    except Artist.DoesNotExist:
-                        artist = Artist(name=artist)
-                        await artist.asave()
-                        await song.artists.aadd(artist)        
-
-    return {'artists': artists}
-
-
 @require_auth
 @template("songs.html")
 async def get_songs(request: HttpRequest):
@@ -89,71 +48,92 @@ async def get_songs(request: HttpRequest):
         
         assert term is not None
         songs = await Song.search(term)
-        songs = list([item[1] for item in songs])
-        proxies = []
-    
-        for song in songs:
-            song_proxy = SongProxy(song)
-            await song_proxy.fetch()
-            proxies.append(song_proxy)
-            
+        proxies = await SongProxy.fetch_many([item[1].pk for item in songs])
         return {'songs': proxies}
     return {'songs': []}
     
 
+WEB_ACTIONS = {
+    "adv1": Action.SKIP,
+    "adv-1": Action.SKIP,
+    "search": Action.ENQUEUE,
+    "vol": Action.VOLUME,
+    "enqueue": Action.ENQUEUE,
+    "seek": Action.SEEK,
+    "skipto": Action.SKIP,
+    "rept": Action.REPEAT,
+}
+
+# Actions which only set something, so only the last of a burst matters.
+COALESCED_ACTIONS = {"vol", "seek"}
+
+
 @require_auth
 async def update_player(request: HttpRequest):
     uid = request.session.get("uid")
-    session = await get_session_or_none_from_uid(request.bot, uid)
+    session = await get_session_or_none_from_request(request)
     if session is None:
         return HttpResponse("NX-VOICE")
     
     action = request.POST.get("action")
     
-    if action == "play":
-        await session.toggle_pause()
-    
-    if action == "adv1":
-        await session.skip(by=1, user_id=uid)
-    if action == "adv-1":
-        await session.skip(by=-1, user_id=uid)
-    if action == "search":
-        songs = await Song.search(request.POST["song"])
-        track = await request.bot.koe.load_tracks(songs[0][1].file.path)
-        assert isinstance(track, koe.Track)
-        await session.enqueue(track, user_id=uid)
-        return HttpResponse("")
-    if action == "vol":
-        vol = int(request.POST["volume"])
-        await session.set_volume(vol, user_id=uid)
-    if action == "enqueue":
-        song_id = int(request.POST["song"])
-        song = await Song.objects.aget(id=song_id)
-        track = await request.bot.koe.load_tracks(song.file.path)
-        await session.enqueue(track, user_id=uid)
-    if action == "seek":
-        if session._current_track is None:
-            return HttpResponse("OK")
-        
-        fraction = int(request.POST["position"]) / 10000
-        position = int(session._current_track.info.length * fraction)
-        await session.seek(millis=position, user_id=uid)
-    if action == "skipto":
-        pos = request.POST["position"]
-        pos = int(pos)
-        await session.skip(to=pos, user_id=uid)
-    
-    if action == "rept":
-        mode = await session.get_repeat_mode()
-        if mode is koe.RepeatMode.NONE:
-            mode = koe.RepeatMode.ALL
-        elif mode is koe.RepeatMode.ALL:
-            mode = koe.RepeatMode.ONE
-        else:
-            mode = koe.RepeatMode.NONE
-        await session.set_repeat_mode(mode)
-    
-    return HttpResponse("OK")
+    # Mutations run one at a time per session, and bursts of slider
+    # updates collapse into the last of them.
+    async def perform():
+        if action == "play":
+            await session.toggle_pause()
+
+        if action == "adv1":
+            await session.skip(by=1, user_id=uid)
+            await apply_gain(session)
+        if action == "adv-1":
+            await session.skip(by=-1, user_id=uid)
+            await apply_gain(session)
+        if action == "search":
+            songs = await Song.search(request.POST["song"])
+            await enqueue_song(session, songs[0][1], uid)
+        if action == "vol":
+            vol = int(request.POST["volume"])
+            await set_volume(session, vol, uid)
+        if action == "enqueue":
+            song_id = int(request.POST["song"])
+            song = await Song.objects.aget_cached(song_id)
+            await enqueue_song(session, song, uid)
+        if action == "seek":
+            if session._current_track is None:
+                return
+
+            fraction = int(request.POST["position"]) / 10000
+            position = int(session._current_track.info.length * fraction)
+            await session.seek(millis=position, user_id=uid)
+        if action == "skipto":
+            pos = request.POST["position"]
+            pos = int(pos)
+            await session.skip(to=pos, user_id=uid)
+            await apply_gain(session)
+
+        if action == "rept":
+            mode = await session.get_repeat_mode()
+            if mode is koe.RepeatMode.NONE:
+                mode = koe.RepeatMode.ALL
+            elif mode is koe.RepeatMode.ALL:
+                mode = koe.RepeatMode.ONE
+            else:
+                mode = koe.RepeatMode.NONE
+            await session.set_repeat_mode(mode)
+
+        # Recorded here so that a collapsed burst is only recorded once.
+        if action == "play":
+            histories.record(session.guild_id, uid, Action.PAUSE if session._paused else Action.RESUME)
+        elif action in WEB_ACTIONS:
+            histories.record(session.guild_id, uid, WEB_ACTIONS[action])
+
+    await session_actions.get(session.guild_id).submit(action, perform, coalesce=action in COALESCED_ACTIONS)
+    
+    player_states.sync(session)
+    activity.touch(session.guild_id)
+    session_manager.mark_dirty(session.guild_id)
+    return HttpResponse("" if action == "search" else "OK")
 
 
 @require_auth
@@ -161,19 +141,28 @@ async def update_player(request: HttpRequest):
 async def playlists(request: HttpRequest):
     owner, _ = await User.objects.aget_or_create(id=request.session['uid'])
     playlists = []
-    songs = []
     async for playlist in Playlist.objects.filter(owner=owner):
         playlists.append(playlist)
         
-        
-    async for song in Song.objects.all():
-        proxy = SongProxy(song)
-        await proxy.fetch()
-        songs.append(proxy)
-        
+    songs = await executor.read(song_options)
     return {'playlists': playlists, 'songs': songs}
 
 
+def song_options() -> list[types.SimpleNamespace]:
+    # The page only lists each song's ID and title, so those are read
+    # straight from the tables, rather than passing the whole library
+    # through the song cache on every load.
+    artists = collections.defaultdict(list)
+    through = Song.artists.through.objects.order_by("pk")
+    for song_id, name in through.values_list("song_id", "artist__name"):
+        artists[song_id].append(name)
+
+    return [
+        types.SimpleNamespace(id=pk, title=f"{', '.join(artists[pk])} - {name}")
+        for pk, name in Song.objects.values_list("pk", "name")
+    ]
+
+
 @require_auth
 @template("playlist_templ.html")
 async def get_playlist(request: HttpRequest):
@@ -187,17 +176,19 @@ async def get_playlist(request: HttpRequest):
         entry = types.SimpleNamespace()
         entry.title, entry.start, entry.end = "", "", ""
         entries = [entry]
+        total = ""
 
     else:
-        playlist = await Playlist.objects.aget(owner=owner, id=playlist_id)
-        entries = []
-    
-        async for song in playlist.songs.all():
-            proxy = SongProxy(song)
-            await proxy.fetch()
-            entries.append(proxy)
+        playlist = await Playlist.objects.aget_cached(playlist_id)
+        if playlist.owner_id != owner.pk:
+            raise Playlist.DoesNotExist
+        
+        songs = await Playlist.objects.aget_songs_cached(playlist)
+        entries = await SongProxy.fetch_many([song.pk for song in songs])
+        duration = sum(song.duration or 0 for song in songs)
+        total = strfdelta(datetime.timedelta(milliseconds=duration), '{%H}:{%M}:{%S}', combine_days_and_hours=True)
     
-    return {'playlist': playlist, 'entries': entries}
+    return {'playlist': playlist, 'entries': entries, 'total': total}
 
 
 @require_auth
@@ -232,7 +223,7 @@ async def save_playlist(request: HttpRequest) -> HttpResponse:
             id = int(song['id'].split("_")[-1])
             start = song['start']
             end = song['end']
-            song = await Song.objects.aget(id=id)
+            song = await Song.objects.aget_cached(id)
             await playlist.songs.aadd(song)
         await playlist.asave()
     
@@ -252,7 +243,7 @@ async def save_playlist(request: HttpRequest) -> HttpResponse:
         id = int(song['id'].split("_")[-1])
         start = song['start']
         end = song['end']
-        song = await Song.objects.aget(id=id)
+        song = await Song.objects.aget_cached(id)
         await playlist.songs.aadd(song)
 
     await playlist.asave()
@@ -1,7 +1,10 @@
+from __future__ import annotations
+
 import datetime
 import koe
 
 from ..models import Artist, Song
+from ....lib.sessions import PlayerState, player_states, user_volume
 from ....lib.utils import strfdelta
 
 
@@ -14,11 +17,9 @@ class TrackProxy:
     
     async def fetch(self) -> None:
         fname = self._track.info.identifier.split("/")[-1]
-        self._song = await Song.objects.aget(file__contains=fname)
-        
-        self._artists = []
-        async for artist in self._song.artists.all():
-            self._artists.append(artist)
+        self._song = await Song.objects.aget_cached_by_file(fname)
+        # Songs from the cache have their artists prefetched.
+        self._artists = list(self._song.artists.all())
             
     def set_pos(self, pos: str) -> None:
         self._pos = pos
@@ -27,6 +28,8 @@ class TrackProxy:
     def length(self) -> str:
         if self._track is None:
             raise RuntimeError
+        if self._song is not None and self._song.duration is not None:
+            return self._song.length
         return strfdelta(
             datetime.timedelta(milliseconds=self._track.info.length),
             '{%M}:{%S}'
@@ -38,6 +41,11 @@ class TrackProxy:
             raise RuntimeError
         return self._track.info.title
     
+    @property
+    def song_id(self) -> int | None:
+        song = getattr(self, "_song", None)
+        return song.pk if song is not None else None
+    
     @property
     def artists(self) -> str:
         if self._artists is None:
@@ -54,6 +62,7 @@ class TrackProxy:
 class CurrentTrackProxy(TrackProxy):
     def __init__(self, session: koe.Session | None):
         self._session = session
+        self._state: PlayerState | None = player_states.get_for(session) if session is not None else None
         
         if self._session is not None and self._session._current_track is not None:
             super().__init__(self._session._current_track)
@@ -65,18 +74,27 @@ class CurrentTrackProxy(TrackProxy):
             await super().fetch()
     
     @property
-    def position(self) -> str:
+    def _position_ms(self) -> int | None:
+        # The cache carries the position forward between looks at the
+        # session, which is only a fallback for tracks it hasn't seen yet.
+        if self._state is not None and self._state.identifier is not None:
+            return self._state.position
         if self._session and self._session._current_track_pos is not None:
-            return strfdelta(
-                datetime.timedelta(milliseconds=self._session._current_track_pos),
-                '{%M}:{%S}'
-            )
+            return self._session._current_track_pos
+        return None
+    
+    @property
+    def position(self) -> str:
+        position = self._position_ms
+        if position is not None:
+            return strfdelta(datetime.timedelta(milliseconds=position), '{%M}:{%S}')
         return " - "
     
     @property
     def permyriad_done(self) -> int:
-        if self._session and self._session._current_track is not None and self._session._current_track_pos is not None:
-            pct = self._session._current_track_pos / self._session._current_track.info.length * 10000
+        position = self._position_ms
+        if self._track is not None and position is not None and self._track.info.length:
+            pct = position / self._track.info.length * 10000
             return int(round(pct, 0))
         return 0
     
@@ -142,6 +160,7 @@ class QueueProxy:
 class SessionProxy:
     def __init__(self, session: koe.Session | None):
         self._session = session
+        self._state: PlayerState | None = player_states.get_for(session) if session is not None else None
         self.current_track = CurrentTrackProxy(session)
         self.queue = QueueProxy(self._session)
         
@@ -151,12 +170,16 @@ class SessionProxy:
     
     @property
     def volume(self) -> int:
-        if self._session and self._session._volume is not None:
-            return self._session._volume
+        if self._state is not None and self._state.volume is not None:
+            return self._state.volume
+        if self._session and user_volume(self._session) is not None:
+            return user_volume(self._session)
         return 0
     
     @property
     def paused(self) -> bool:
+        if self._state is not None:
+            return self._state.paused
         if self._session and self._session._paused is not None:
             return self._session._paused
         return False
@@ -190,8 +213,20 @@ class SongProxy:
         self._artists = []
     
     async def fetch(self) -> None:
-        async for artist in self._song.artists.all():
-            self._artists.append(artist)
+        self._song = await Song.objects.aget_cached(self._song.pk)
+        # Songs from the cache have their artists prefetched.
+        self._artists = list(self._song.artists.all())
+    
+    @classmethod
+    async def fetch_many(cls, song_ids: list[int]) -> list[SongProxy]:
+        songs = await Song.objects.ain_bulk_cached(song_ids)
+        proxies = []
+        for song_id in song_ids:
+            if song_id in songs:
+                proxy = cls(songs[song_id])
+                proxy._artists = list(proxy._song.artists.all())
+                proxies.append(proxy)
+        return proxies
     
     @property
     def artists(self) -> str:
@@ -210,3 +245,7 @@ class SongProxy:
     @property
     def id(self) -> int:
         return self._song.id
+    
+    @property
+    def length(self) -> str:
+        return self._song.length
@@ -0,0 +1,228 @@
+"""
+Views handling resumable, chunked uploads.
+
+Files are sent in chunks of at most CHUNK_SIZE bytes, each of which is
+appended straight to a partial file under cabinet/.partial/ and hashed as
+it arrives. Once every chunk is in, the partial file is renamed into its
+content-addressed home at cabinet/<library>/<sha256>.<ext>, so the bytes
+only ever touch the disk once. Audio which is already in the library is
+dropped instead, and the existing song is used. If a transfer is interrupted, upload-status
+reports how much was received and the client carries on from there.
+"""
+import asyncio
+import hashlib
+import os
+import pathlib
+import re
+import time
+import typing
+
+from django.db.utils import IntegrityError
+from django.http import JsonResponse
+import orjson as json
+
+from ...core.oauth2 import require_auth
+from ...core.utils import template
+from ...discord.middleware import DiscordAwareHttpRequest as HttpRequest
+from ...music.analysis import schedule_analysis
+from ...music.models import Artist, Library, Song
+from ....core.conf import Config
+
+
+conf = Config.load()
+
+# Kept under DATA_UPLOAD_MAX_MEMORY_SIZE, so each chunk stays in memory.
+CHUNK_SIZE = 2 * 1024 * 1024
+ALLOWED_EXTENSIONS = {"mp3", "flac", "ogg", "opus", "m4a", "wav"}
+DEFAULT_LIBRARY = "Society of Spilled Milk"
+PARTIAL_TTL = 86400
+UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+PARTIAL_DIR = pathlib.Path(conf.mvc.upload_root) / "cabinet" / ".partial"
+
+
+class PartialUpload:
+    def __init__(self, upload_id: str):
+        self.path = PARTIAL_DIR / upload_id
+        self.lock = asyncio.Lock()
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def load(self) -> None:
+        """Rehash whatever was received before the process last restarted."""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            while data := f.read(1 << 20):
+                self.hash.update(data)
+                self.size += len(data)
+
+    def append(self, stream: typing.BinaryIO, limit: int) -> bool:
+        """
+        Append the stream to the partial file, provided it holds at most
+        `limit` bytes. If it holds more, nothing is kept and False is returned.
+        """
+        os.makedirs(PARTIAL_DIR, exist_ok=True)
+        sha256 = self.hash.copy()
+        size = 0
+        with open(self.path, "ab") as f:
+            while data := stream.read(min(1 << 16, limit - size + 1)):
+                size += len(data)
+                if size > limit:
+                    f.truncate(self.size)
+                    return False
+                sha256.update(data)
+                f.write(data)
+
+        self.hash = sha256
+        self.size += size
+        return True
+
+
+_uploads: dict[str, PartialUpload] = {}
+
+
+async def get_partial_upload(upload_id: str) -> PartialUpload:
+    upload = _uploads.get(upload_id)
+    if upload is None:
+        upload = _uploads[upload_id] = PartialUpload(upload_id)
+        async with upload.lock:
+            await asyncio.to_thread(upload.load)
+    return upload
+
+
+def expire_partial_uploads() -> None:
+    if not PARTIAL_DIR.exists():
+        return
+    for path in PARTIAL_DIR.iterdir():
+        if time.time() - path.stat().st_mtime > PARTIAL_TTL:
+            _uploads.pop(path.name, None)
+            path.unlink(missing_ok=True)
+
+
+def commit_upload(partial: pathlib.Path, final: pathlib.Path) -> None:
+    os.makedirs(final.parent, exist_ok=True)
+    if final.exists():
+        # Same hash, same bytes. The copy already in the cabinet will do.
+        partial.unlink()
+    else:
+        os.replace(partial, final)
+
+
+async def find_existing_song(sha256: str, name: str, artist_names: list[str]) -> Song | None:
+    # Identical audio is already in the library, so point at it rather than
+    # adding a second song for the same file.
+    song = await Song.objects.filter(sha256=sha256).afirst()
+    if song is not None:
+        return song
+
+    try:
+        song = await Song.objects.aget(name=name)
+        for artist_name in artist_names:
+            artist = await Artist.objects.aget(name=artist_name)
+            if not await song.artists.acontains(artist):
+                return None
+        return song
+    except (Song.DoesNotExist, Artist.DoesNotExist):
+        return None
+
+
+async def create_song(path: str, sha256: str, library: Library, name: str, artist_names: list[str]) -> Song:
+    song = Song(name=name, library=library, file=path, sha256=sha256)
+    await song.asave()
+
+    for artist_name in artist_names:
+        artist, _ = await Artist.objects.aget_or_create(name=artist_name)
+        await song.artists.aadd(artist)
+    return song
+
+
+def error(reason: str, status: int = 400, **kwargs) -> JsonResponse:
+    return JsonResponse({'status': 'error', 'reason': reason, **kwargs}, status=status)
+
+
+@require_auth
+@template("upload.html")
+async def upload_file(request: HttpRequest) -> dict[str, typing.Any]:
+    await asyncio.to_thread(expire_partial_uploads)
+
+    artists = []
+    async for artist in Artist.objects.all():
+        artists.append(artist)
+    return {'artists': artists, 'chunk_size': CHUNK_SIZE}
+
+
+@require_auth
+async def upload_status(request: HttpRequest) -> JsonResponse:
+    upload_id = request.GET.get("upload_id", "")
+    if not UPLOAD_ID.match(upload_id):
+        return error("Invalid upload ID.")
+
+    upload = await get_partial_upload(upload_id)
+    return JsonResponse({'status': 'success', 'offset': upload.size})
+
+
+@require_auth
+async def upload_chunk(request: HttpRequest) -> JsonResponse:
+    upload_id = request.GET.get("upload_id", "")
+    if not UPLOAD_ID.match(upload_id):
+        return error("Invalid upload ID.")
+    try:
+        offset = int(request.GET.get("offset", ""))
+        length = int(request.headers.get("Content-Length") or 0)
+    except ValueError:
+        return error("Invalid offset or Content-Length.")
+    if length > CHUNK_SIZE:
+        return error(f"Chunks may be at most {CHUNK_SIZE} bytes.", status=413)
+
+    upload = await get_partial_upload(upload_id)
+    async with upload.lock:
+        if offset != upload.size:
+            return error("Chunk does not start where the upload left off.", status=409, offset=upload.size)
+        # Content-Length can't be trusted, so the bytes actually read are capped too.
+        if not await asyncio.to_thread(upload.append, request, CHUNK_SIZE):
+            return error(f"Chunks may be at most {CHUNK_SIZE} bytes.", status=413, offset=upload.size)
+    return JsonResponse({'status': 'success', 'offset': upload.size})
+
+
+@require_auth
+async def upload_finish(request: HttpRequest) -> JsonResponse:
+    data = json.loads(request.POST['data'])
+    upload_id = data.get('upload_id', "")
+    if not UPLOAD_ID.match(upload_id):
+        return error("Invalid upload ID.")
+
+    ext = data['filename'].rsplit(".", 1)[-1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        return error(f"Files of type .{ext} are not accepted.")
+    if not data['name'] or not data['artists']:
+        return error("A title and at least one artist are required.")
+
+    library = await Library.objects.aget(name=DEFAULT_LIBRARY)
+    upload = await get_partial_upload(upload_id)
+
+    async with upload.lock:
+        if upload.size != int(data['size']):
+            return error("The upload is incomplete.", status=409, offset=upload.size)
+
+        sha256 = upload.hash.hexdigest()
+        song = await find_existing_song(sha256, data['name'], data['artists'])
+        if song is not None:
+            await asyncio.to_thread(upload.path.unlink, missing_ok=True)
+            _uploads.pop(upload_id, None)
+            return JsonResponse({'status': 'success', 'song_id': song.pk, 'duplicate': True})
+
+        path = f"cabinet/{library.id}/{sha256}.{ext}"
+        await asyncio.to_thread(commit_upload, upload.path, pathlib.Path(conf.mvc.upload_root) / path)
+        _uploads.pop(upload_id, None)
+
+    try:
+        song = await create_song(path, sha256, library, data['name'], data['artists'])
+    except IntegrityError:
+        # Another upload of the same file finished first and made the song.
+        song = await Song.objects.filter(sha256=sha256).afirst()
+        if song is None:
+            raise
+        return JsonResponse({'status': 'success', 'song_id': song.pk, 'duplicate': True})
+    schedule_analysis(song)
+    return JsonResponse({'status': 'success', 'song_id': song.pk, 'duplicate': False})
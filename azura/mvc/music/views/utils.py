@@ -1,20 +1,28 @@
 import koe
 
+from ....lib.sessions import voice_index
+
 
 def get_voice_state_for_user(bot, user):
-    for guild, user_state in bot.cache.get_voice_states_view().items():
-        for u, state in user_state.items():
-            if u == user:
-                return guild, state
-    return None, None
+    location = voice_index.get(user)
+    if location is None:
+        return None, None
+    return location
 
 
 async def get_session_or_none_from_uid(bot, user) -> koe.Session | None:
-    guild, state = get_voice_state_for_user(bot, user)
+    guild, channel = get_voice_state_for_user(bot, user)
     
     if guild is None:
         return None
-    if state is None:
+    if channel is None:
         return None
     
-    return await bot.koe.get_session_or_none_by(guild_id=guild)
\ No newline at end of file
+    return await bot.nodes.get_session_or_none_by(guild)
+
+
+async def get_session_or_none_from_request(request) -> koe.Session | None:
+    # Resolved once per request, however many proxies and helpers want it.
+    if not hasattr(request, "_voice_session"):
+        request._voice_session = await get_session_or_none_from_uid(request.bot, request.session.get("uid"))
+    return request._voice_session
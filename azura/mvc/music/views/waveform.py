@@ -0,0 +1,85 @@
+"""
+Views serving precomputed waveform peaks.
+
+Peaks are written beside each song's file by the analysis pool, so these
+views only ever read a kilobyte from disk. Responses carry an ETag, and
+since the player asks for the same waveform every time it refreshes, the
+browser's cache answers nearly all of those requests.
+"""
+import asyncio
+import os
+
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+
+from ...core.oauth2 import require_auth
+from ...discord.middleware import DiscordAwareHttpRequest as HttpRequest
+from ...music.analysis import peaks_path
+from ...music.models import Song
+
+
+WIDTH = 1000
+HEIGHT = 64
+CACHE_CONTROL = "private, max-age=86400"
+
+
+def read_peaks(path: str) -> tuple[bytes, str] | None:
+    try:
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            return f.read(), f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    except FileNotFoundError:
+        return None
+
+
+async def get_peaks_or_404(song_id: int) -> tuple[bytes, str]:
+    try:
+        song = await Song.objects.aget_cached(song_id)
+    except Song.DoesNotExist:
+        raise Http404
+    if not song.file:
+        raise Http404
+
+    result = await asyncio.to_thread(read_peaks, peaks_path(song.file.path))
+    if result is None:
+        raise Http404
+    return result
+
+
+def render_svg(peaks: bytes) -> str:
+    middle = HEIGHT / 2
+    step = WIDTH / max(len(peaks), 1)
+    # One vertical stroke per peak, mirrored about the middle.
+    path = "".join(
+        f"M{i * step:.1f} {middle - peak * middle / 127:.1f}V{middle + peak * middle / 127:.1f}"
+        for i, peak in enumerate(peaks)
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" preserveAspectRatio="none">'
+        f'<path d="{path}" stroke="currentColor" stroke-width="{step:.2f}" fill="none"/></svg>'
+    )
+
+
+@require_auth
+async def get_peaks(request: HttpRequest, song_id: int) -> HttpResponse:
+    peaks, etag = await get_peaks_or_404(song_id)
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponseNotModified(headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL})
+
+    return HttpResponse(
+        peaks,
+        content_type="application/octet-stream",
+        headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    )
+
+
+@require_auth
+async def get_waveform(request: HttpRequest, song_id: int) -> HttpResponse:
+    peaks, etag = await get_peaks_or_404(song_id)
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponseNotModified(headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL})
+
+    return HttpResponse(
+        render_svg(peaks),
+        content_type="image/svg+xml",
+        headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL}
+    )
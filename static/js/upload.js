@@ -70,35 +70,113 @@ $("#files").bind('change', function () {
 
 
 var csrf = $("input[name=csrfmiddlewaretoken]").val();
+var chunk_size = parseInt($("#form").data("chunk-size"));
+var allowed_extensions = ["mp3", "flac", "ogg", "opus", "m4a", "wav"];
+var concurrency = 3;
+var max_retries = 5;
+
+
 $(document).on('submit', '#form', function (e) {
   e.preventDefault();
   e.stopPropagation();
 });
 
-$(document).on('click', '#submit', function () {
+
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+
+// The upload ID is remembered per file, so that reloading the page and
+// picking the same file again resumes where the last attempt stopped.
+function get_upload_id(file) {
+  var key = `upload_${file.name}_${file.size}_${file.lastModified}`;
+  var upload_id = localStorage.getItem(key);
+  if (!upload_id) {
+    upload_id = crypto.randomUUID().replaceAll("-", "");
+    localStorage.setItem(key, upload_id);
+  }
+  return [key, upload_id];
+}
+
+
+async function send_file(file, song, on_progress) {
+  var [key, upload_id] = get_upload_id(file);
+  var status = await $.get("/music/upload-status", {upload_id: upload_id});
+  var offset = status.offset;
+  var retries = 0;
+  on_progress(offset);
+
+  while (offset < file.size) {
+    try {
+      var response = await $.ajax({
+        type: 'POST',
+        url: `/music/upload-chunk?upload_id=${upload_id}&offset=${offset}`,
+        data: file.slice(offset, offset + chunk_size),
+        processData: false,
+        contentType: 'application/octet-stream'
+      });
+      offset = response.offset;
+      retries = 0;
+    } catch (e) {
+      if (e.status == 409) {
+        offset = e.responseJSON.offset;
+      } else if (retries < max_retries) {
+        retries = retries + 1;
+        await sleep(1000 * 2 ** retries);
+      } else {
+        throw e;
+      }
+    }
+    on_progress(offset);
+  }
+
+  song.upload_id = upload_id;
+  song.filename = file.name;
+  song.size = file.size;
+  var result = await $.post("/music/upload-finish", {data: JSON.stringify(song)});
+  localStorage.removeItem(key);
+  return result;
+}
+
+
+async function run_pool(jobs, limit) {
+  var next = 0;
+  async function worker() {
+    while (next < jobs.length) {
+      var job = jobs[next];
+      next = next + 1;
+      await job();
+    }
+  }
+  var workers = [];
+  for (let i=0; i<Math.min(limit, jobs.length); i++) {
+    workers.push(worker());
+  }
+  await Promise.all(workers);
+}
+
+
+$(document).on('click', '#submit', async function () {
   $.ajaxSetup({
     headers: {'X-CSRFToken': csrf}
   });
 
-  var data = new FormData($("#form")[0]);
-  var old_files = data.getAll("files");
-  data.delete("files");
-  
+  var files = $("#files")[0].files;
   var rows = $("#songs").prop("rows");
+  var uploads = [];
 
   for (let i=0; i<rows.length; i++) {
     var row = rows[i];
     var id = $(row).attr("id").split("_").pop();
     var fname = $(`#fname_${id}`).html();
-    var f = fname.split(".");
-    var ext = f[f.length-1];
-    newname = `${id}.${ext}`;
+    var ext = fname.split(".").pop().toLowerCase();
     var name = $(`#name_${id}`).val();
-    var file = old_files[i];
+    var file = files[i];
     var artists = [];
 
-    if (file.type != "audio/mpeg") {
-      toastr.error(`Invalid file type for ${fname}: ${file.type}. Only MP3 files are accepted.`);
+    if (!allowed_extensions.includes(ext)) {
+      toastr.error(`Invalid file type for ${fname}. Accepted types are ${allowed_extensions.join(", ")}.`);
       return;
     }
 
@@ -115,33 +193,39 @@ $(document).on('click', '#submit', function () {
       toastr.error(`At least one artist must be specified for ${fname}.`);
       return;
     }
-    
-    var adata = {
-      fname: newname,
-      name: name,
-      artists: artists
-    };
-    data.append(newname, JSON.stringify(adata));
-    data.append(newname, file);
+
+    uploads.push({file: file, song: {name: name, artists: artists}});
   }
 
-   $("#submit").prop("disabled", true);
-
-  $.ajax({
-    type: 'POST',
-    data: data,
-    processData: false,
-    contentType: false,
-    xhr: function () {
-      var xhr = new window.XMLHttpRequest();
-      xhr.upload.addEventListener("progress", function(event) {
-        if (event.lengthComputable) {
-          var percentComplete = event.loaded / event.total;
-          $("#upload_progress").val(percentComplete * 100);
-        }
-      }, false);
-
-      return xhr;
+  $("#submit").prop("disabled", true);
+
+  var total = uploads.reduce((sum, upload) => sum + upload.file.size, 0);
+  var sent = uploads.map(() => 0);
+  var failed = 0;
+
+  var jobs = uploads.map((upload, i) => async function () {
+    try {
+      var result = await send_file(upload.file, upload.song, function (offset) {
+        sent[i] = offset;
+        var done = sent.reduce((sum, n) => sum + n, 0);
+        $("#upload_progress").val(total ? done / total * 100 : 100);
+      });
+      if (result.duplicate) {
+        toastr.info(`${upload.file.name} is already in the library.`);
+      }
+    } catch (e) {
+      failed = failed + 1;
+      var reason = e.responseJSON ? e.responseJSON.reason : e.statusText;
+      toastr.error(`Failed to upload ${upload.file.name}: ${reason}`);
     }
   });
-});
\ No newline at end of file
+
+  await run_pool(jobs, concurrency);
+
+  if (failed == 0) {
+    toastr.success("All files uploaded.");
+  } else {
+    // Whatever did make it is kept, so trying again picks up from there.
+    $("#submit").prop("disabled", false);
+  }
+});